@@ -0,0 +1,167 @@
+"""
+IndexerConf 微基准：对比旧版普通对象与 slots 版本的内存占用、构造和序列化耗时
+
+用法：python benchmarks/jackett_indexerconf.py [索引器数量]
+"""
+
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "plugins", "jackett"))
+
+from utils import IndexerConf  # noqa: E402
+
+
+class LegacyIndexerConf:
+    """
+    旧版 IndexerConf
+    """
+
+    def __init__(
+        self,
+        datas=None,
+        siteid=None,
+        cookie=None,
+        name=None,
+        rule=None,
+        public=None,
+        proxy=False,
+        parser=None,
+        ua=None,
+        render=None,
+        builtin=True,
+        language=None,
+        pri=None,
+    ):
+        if not datas:
+            return None
+        self.id = datas.get("id")
+        self.siteid = siteid
+        self.name = datas.get("name") if not name else name
+        self.builtin = datas.get("builtin")
+        self.domain = datas.get("domain")
+        self.search = datas.get("search", {})
+        self.batch = self.search.get("batch", {}) if builtin else {}
+        self.parser = parser if parser is not None else datas.get("parser")
+        self.render = render if render is not None else datas.get("render")
+        self.browse = datas.get("browse", {})
+        self.torrents = datas.get("torrents", {})
+        self.category = datas.get("category", {})
+        self.cookie = cookie
+        self.ua = ua
+        self.rule = rule
+        self.public = datas.get("public") if not public else public
+        self.proxy = datas.get("proxy") if not proxy else proxy
+        self.language = language
+        self.pri = pri if pri else 0
+
+    def to_dict(self):
+        return {
+            "id": self.id or "",
+            "siteid": self.siteid or "",
+            "name": self.name or "",
+            "builtin": self.builtin or True,
+            "domain": self.domain or "",
+            "search": self.search or "",
+            "batch": self.batch or {},
+            "parser": self.parser or "",
+            "render": self.render or False,
+            "browse": self.browse or {},
+            "torrents": self.torrents or {},
+            "category": self.category or {},
+            "cookie": self.cookie or "",
+            "ua": self.ua or "",
+            "rule": self.rule or "",
+            "public": self.public or False,
+            "proxy": self.proxy or "",
+            "pri": self.pri or 0,
+        }
+
+    def to_dict_str(self, ensure_ascii=False, formatted=True):
+        if formatted:
+            return json.dumps(self.to_dict(), ensure_ascii=ensure_ascii, indent=4)
+        return json.dumps(self.to_dict(), ensure_ascii=ensure_ascii)
+
+
+def make_datas(count: int):
+    """
+    生成与 Jackett 插件相同结构的索引器配置，每次都是新的对象，模拟从 JSON 加载
+    """
+    host = "http://127.0.0.1:9117"
+    return [
+        {
+            "id": f"indexer{i}-jackett",
+            "name": f"Indexer {i} (Jackett)",
+            "domain": f"{host}/api/v2.0/indexers/indexer{i}/results/torznab/",
+            "public": bool(i % 2),
+            "proxy": True,
+            "search": {
+                "paths": [{"path": "?apikey=key&t=search&q={keyword}", "method": "get"}]
+            },
+            "torrents": {
+                "list": {"selector": "item"},
+                "fields": {
+                    "id": {"selector": "link"},
+                    "title": {"selector": "title"},
+                    "details": {"selector": "comments"},
+                    "size": {"selector": "size"},
+                    "seeders": {
+                        "selector": 'torznab:attr[name="seeders"]',
+                        "attribute": "value",
+                    },
+                    "downloadvolumefactor": {"case": {"*": 0}},
+                    "uploadvolumefactor": {"case": {"*": 1}},
+                },
+            },
+        }
+        for i in range(count)
+    ]
+
+
+def measure(label: str, build, serialize, count: int):
+    datas = json.loads(json.dumps(make_datas(count)))
+    start = time.perf_counter()
+    confs = [build(data) for data in datas]
+    build_time = time.perf_counter() - start
+    start = time.perf_counter()
+    size = sum(len(serialize(conf)) for conf in confs)
+    dump_time = time.perf_counter() - start
+    del confs
+    # 单独统计内存，tracemalloc 会拖慢构造耗时；从 JSON 加载开始统计，释放原始配置后只剩配置对象保留的内存
+    payload = json.dumps(make_datas(count))
+    tracemalloc.start()
+    datas = json.loads(payload)
+    confs = [build(data) for data in datas]
+    del datas
+    memory = tracemalloc.get_traced_memory()[0]
+    del confs
+    tracemalloc.stop()
+    print(
+        f"{label:<10} 构造 {build_time * 1000:8.1f} ms  "
+        f"序列化 {dump_time * 1000:8.1f} ms  "
+        f"内存 {memory / 1024:8.1f} KB  输出 {size / 1024:8.1f} KB"
+    )
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    print(f"索引器数量：{count}")
+    measure(
+        "legacy",
+        lambda data: LegacyIndexerConf(data),
+        lambda conf: conf.to_dict_str(),
+        count,
+    )
+    measure(
+        "slots",
+        IndexerConf.from_dict,
+        lambda conf: conf.to_dict_str(),
+        count,
+    )
+
+
+if __name__ == "__main__":
+    main()
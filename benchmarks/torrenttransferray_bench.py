@@ -0,0 +1,637 @@
+"""
+TorrentTransferRay 离线基准：使用进程内的 qBittorrent / Transmission 替身和合成的 BT_backup 目录，
+测量 transfer 与 check_recheck 的吞吐量、峰值内存和下载器请求次数，无需真实的下载器
+
+用法：
+    python benchmarks/torrenttransferray_bench.py --count 1000,10000 --latency 2
+    python benchmarks/torrenttransferray_bench.py --count 100000 --source transmission --workers 8
+
+替身只在本进程内注册为 app.* 模块，不依赖 MoviePilot 主程序。
+"""
+
+import argparse
+import hashlib
+import logging
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import types
+from datetime import datetime
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, List, Optional
+
+from bencode import bencode
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+# ---------------------------------------------------------------------------
+# MoviePilot 替身
+# ---------------------------------------------------------------------------
+
+def _module(name: str, **attrs) -> types.ModuleType:
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    sys.modules[name] = module
+    return module
+
+
+class _Settings:
+    TZ = "Asia/Shanghai"
+
+    def __init__(self, data_path: Path):
+        self.TEMP_PATH = data_path / "temp"
+        self.PLUGIN_DATA_PATH = data_path / "plugins"
+        self.TEMP_PATH.mkdir(parents=True, exist_ok=True)
+        self.PLUGIN_DATA_PATH.mkdir(parents=True, exist_ok=True)
+
+
+class _ServiceInfo:
+    def __init__(self, name: str, type: str, instance: Any):
+        self.name = name
+        self.type = type
+        self.instance = instance
+
+
+class _DownloaderHelper:
+    services: Dict[str, _ServiceInfo] = {}
+
+    def get_service(self, name: str) -> Optional[_ServiceInfo]:
+        return self.services.get(name)
+
+    @staticmethod
+    def is_downloader(service_type: str, service: _ServiceInfo = None, **kwargs) -> bool:
+        return bool(service) and service.type == service_type
+
+    def get_configs(self) -> dict:
+        return {}
+
+
+class _StringUtils:
+    @staticmethod
+    def generate_random_str(length: int) -> str:
+        return "".join(random.choices("abcdefghijklmnopqrstuvwxyz", k=length))
+
+    @staticmethod
+    def str_filesize(size: int) -> str:
+        return f"{size / 1024 / 1024:.1f}MB"
+
+
+def install_app_stubs(data_path: Path):
+    """
+    注册插件依赖的 app.* 模块
+    """
+    logger = logging.getLogger("torrenttransferray")
+    logger.warn = logger.warning
+
+    class _PluginBase:
+        _store: Dict[str, Any] = {}
+
+        def update_config(self, config: dict):
+            pass
+
+        def save_data(self, key: str, value: Any):
+            self._store[key] = value
+
+        def get_data(self, key: str = None) -> Any:
+            return self._store.get(key)
+
+        def del_data(self, key: str):
+            self._store.pop(key, None)
+
+        def post_message(self, **kwargs):
+            pass
+
+        def get_data_path(self) -> Path:
+            path = settings.PLUGIN_DATA_PATH / type(self).__name__.lower()
+            path.mkdir(parents=True, exist_ok=True)
+            return path
+
+    settings = _Settings(data_path)
+    _module("app")
+    _module("app.core")
+    _module("app.core.config", settings=settings)
+    _module("app.log", logger=logger)
+    _module("app.schemas", ServiceInfo=_ServiceInfo,
+            NotificationType=types.SimpleNamespace(SiteMessage="SiteMessage"))
+    _module("app.helper")
+    _module("app.helper.downloader", DownloaderHelper=_DownloaderHelper)
+    _module("app.helper.torrent", TorrentHelper=type("TorrentHelper", (), {}))
+    _module("app.modules")
+    _module("app.modules.qbittorrent", Qbittorrent=FakeQbittorrent)
+    _module("app.modules.transmission", Transmission=FakeTransmission)
+    _module("app.plugins", _PluginBase=_PluginBase)
+    _module("app.utils")
+    _module("app.utils.string", StringUtils=_StringUtils)
+
+
+# ---------------------------------------------------------------------------
+# 下载器替身
+# ---------------------------------------------------------------------------
+
+class _FakeDownloader:
+    """
+    下载器替身的公共部分：请求计数、模拟延迟和校验耗时
+    capacity大于0时，同时进行的请求超过该值后延迟按超出数量线性增加，模拟过载的WebUI
+    """
+
+    def __init__(self, latency: float = 0, recheck_time: float = 0, capacity: int = 0):
+        self._lock = Lock()
+        self.latency = latency
+        self.recheck_time = recheck_time
+        self.capacity = capacity
+        self.inflight = 0
+        self.calls: Dict[str, int] = {}
+
+    def _call(self, name: str):
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+            self.inflight += 1
+            overload = max(self.inflight - self.capacity, 0) if self.capacity else 0
+        if self.latency:
+            time.sleep(self.latency * (1 + overload))
+        with self._lock:
+            self.inflight -= 1
+
+    def is_inactive(self) -> bool:
+        return False
+
+    @staticmethod
+    def _info_hash(content: bytes) -> str:
+        from torrenttransferray.utils import get_info_hash
+        return get_info_hash(content)
+
+    @staticmethod
+    def _total_size(content: bytes) -> int:
+        from torrenttransferray.utils import get_torrent_size
+        return get_torrent_size(content)
+
+
+class FakeQbittorrent(_FakeDownloader):
+    """
+    qBittorrent 替身，种子为字典，sync/maindata 按 rid 只返回之后有变化或已删除的种子
+    disk_rate大于0时按磁盘模型校验：同时校验的种子平分读取速度，每多一个并发总速度因寻道下降seek_penalty
+    """
+
+    def __init__(self, torrents: List[dict] = None, disk_rate: float = 0, seek_penalty: float = 0.3, **kwargs):
+        super().__init__(**kwargs)
+        self.torrents: Dict[str, dict] = {t["hash"]: t for t in torrents or []}
+        # 数据版本，即 sync/maindata 的 rid；种子 -> 最后变化/删除时的版本
+        self._version = 1
+        self._modified: Dict[str, int] = {}
+        self._removed: Dict[str, int] = {}
+        self.disk_rate = disk_rate
+        self.seek_penalty = seek_penalty
+        # 校验中的种子：完成时间，磁盘模型下为剩余字节数
+        self._checking: Dict[str, float] = {}
+        self._refreshed = time.time()
+        # 各种子校验完成的时间
+        self.checked_at: List[float] = []
+        self.qbc = self
+
+    def __refresh(self):
+        now = time.time()
+        if not self.disk_rate:
+            for torrent_hash, done_at in list(self._checking.items()):
+                if done_at <= now:
+                    self.__checked(torrent_hash, done_at)
+            return
+        clock, self._refreshed = self._refreshed, now
+        while self._checking and clock < now:
+            count = len(self._checking)
+            rate = self.disk_rate / (1 + self.seek_penalty * (count - 1)) / count
+            step = min(min(self._checking.values()) / rate, now - clock)
+            clock += step
+            for torrent_hash in list(self._checking):
+                self._checking[torrent_hash] -= step * rate
+                if self._checking[torrent_hash] <= 1:
+                    self.__checked(torrent_hash, clock)
+
+    def __checked(self, torrent_hash: str, checked_at: float):
+        self._checking.pop(torrent_hash)
+        self.checked_at.append(checked_at)
+        torrent = self.torrents.get(torrent_hash)
+        if torrent:
+            torrent.update(state="pausedUP", progress=1)
+            self.__touch(torrent_hash)
+
+    def __touch(self, torrent_hash: str, removed: bool = False):
+        self._version += 1
+        if removed:
+            self._modified.pop(torrent_hash, None)
+            self._removed[torrent_hash] = self._version
+        else:
+            self._modified[torrent_hash] = self._version
+
+    def get_completed_torrents(self, **kwargs) -> List[dict]:
+        self._call("get_completed_torrents")
+        return list(self.torrents.values())
+
+    def get_torrents(self, ids: List[str] = None, **kwargs):
+        self._call("get_torrents")
+        with self._lock:
+            self.__refresh()
+            if ids is None:
+                return list(self.torrents.values()), False
+            return [self.torrents[i] for i in ids if i in self.torrents], False
+
+    def add_torrent(self, content: bytes, download_dir: str = None, is_paused: bool = False,
+                    tag: List[str] = None, is_skip_checking: bool = False, **kwargs) -> bool:
+        self._call("add_torrent")
+        torrent_hash = self._info_hash(content)
+        with self._lock:
+            self.torrents[torrent_hash] = {
+                "hash": torrent_hash,
+                "save_path": download_dir,
+                "tags": ",".join(tag or []),
+                "category": "",
+                "state": "pausedUP" if is_skip_checking else "pausedDL",
+                "size": self._total_size(content),
+                "progress": 1 if is_skip_checking else 0
+            }
+            self.__touch(torrent_hash)
+        return True
+
+    def get_torrent_id_by_tag(self, tags: str = None, **kwargs) -> Optional[str]:
+        self._call("get_torrent_id_by_tag")
+        for torrent_hash, torrent in self.torrents.items():
+            if tags in torrent["tags"].split(","):
+                return torrent_hash
+        return None
+
+    def recheck_torrents(self, ids: List[str] = None) -> bool:
+        self._call("recheck_torrents")
+        with self._lock:
+            self.__refresh()
+            done_at = time.time() + self.recheck_time
+            for torrent_hash in ids or []:
+                if torrent_hash in self.torrents:
+                    self.torrents[torrent_hash].update(state="checkingUP", progress=0)
+                    self.__touch(torrent_hash)
+                    self._checking[torrent_hash] = self.torrents[torrent_hash]["size"] \
+                        if self.disk_rate else done_at
+        return True
+
+    def start_torrents(self, ids: List[str] = None) -> bool:
+        self._call("start_torrents")
+        with self._lock:
+            for torrent_hash in ids or []:
+                if torrent_hash in self.torrents:
+                    self.torrents[torrent_hash]["state"] = "uploading"
+                    self.__touch(torrent_hash)
+        return True
+
+    def delete_torrents(self, delete_file: bool = False, ids: List[str] = None) -> bool:
+        self._call("delete_torrents")
+        with self._lock:
+            for torrent_hash in ids or []:
+                if self.torrents.pop(torrent_hash, None):
+                    self.__touch(torrent_hash, removed=True)
+        return True
+
+    def sync_maindata(self, rid: int = 0) -> dict:
+        """
+        sync/maindata：rid 为 0 或未知时返回全量数据，否则只返回变化的种子
+        返回的种子条数累计到 calls["sync_maindata.torrents"]
+        """
+        self._call("sync_maindata")
+        with self._lock:
+            self.__refresh()
+            if not rid or rid > self._version:
+                data = {
+                    "rid": self._version,
+                    "full_update": True,
+                    "torrents": {h: dict(t) for h, t in self.torrents.items()}
+                }
+            else:
+                data = {
+                    "rid": self._version,
+                    "torrents": {h: dict(self.torrents[h]) for h, version in self._modified.items()
+                                 if version > rid and h in self.torrents},
+                    "torrents_removed": [h for h, version in self._removed.items() if version > rid]
+                }
+            self.calls["sync_maindata.torrents"] = self.calls.get("sync_maindata.torrents", 0) \
+                + len(data["torrents"])
+            return data
+
+
+class _TrStatus:
+    __slots__ = ("stopped", "checking", "check_pending")
+
+    def __init__(self, stopped: bool = True, checking: bool = False):
+        self.stopped = stopped
+        self.checking = checking
+        self.check_pending = False
+
+
+class _TrTorrent:
+    __slots__ = ("hashString", "download_dir", "labels", "done_date", "status",
+                 "percent_done", "total_size", "recheck_progress", "checked_at", "changed_at")
+
+    def __init__(self, torrent_hash: str, download_dir: str, labels: List[str], size: int):
+        self.hashString = torrent_hash
+        self.download_dir = download_dir
+        self.labels = labels
+        self.done_date = datetime.now()
+        self.status = _TrStatus()
+        self.percent_done = 1
+        self.total_size = size
+        self.recheck_progress = 0
+        self.checked_at = 0.0
+        self.changed_at = time.time()
+
+
+class _FakeTrClient:
+    """
+    transmission_rpc.Client 替身，提供 RecheckMonitor 使用的 get_torrents 和 recently-active 接口
+    """
+
+    # recently-active 返回最近该时间（秒）内有变化的种子
+    ACTIVE_WINDOW = 60
+
+    def __init__(self, downloader: "FakeTransmission"):
+        self._downloader = downloader
+
+    def get_torrents(self, ids: List[str] = None, arguments: List[str] = None) -> List[_TrTorrent]:
+        torrents, _ = self._downloader.get_torrents(ids=ids)
+        return torrents
+
+    def get_recently_active_torrents(self, arguments: List[str] = None):
+        downloader = self._downloader
+        downloader._call("get_recently_active_torrents")
+        since = time.time() - self.ACTIVE_WINDOW
+        with downloader._lock:
+            downloader.refresh()
+            active = [t for t in downloader.torrents.values() if t.changed_at >= since]
+            removed = [h for h, removed_at in downloader.removed.items() if removed_at >= since]
+        downloader.calls["get_recently_active_torrents.torrents"] = \
+            downloader.calls.get("get_recently_active_torrents.torrents", 0) + len(active)
+        return active, removed
+
+
+class FakeTransmission(_FakeDownloader):
+    """
+    Transmission 替身，种子为对象，添加后自动校验
+    """
+
+    def __init__(self, torrents: List[_TrTorrent] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.torrents: Dict[str, _TrTorrent] = {t.hashString: t for t in torrents or []}
+        # 已删除的种子 -> 删除时间
+        self.removed: Dict[str, float] = {}
+        self.trc = _FakeTrClient(self)
+
+    def refresh(self):
+        now = time.time()
+        for torrent in self.torrents.values():
+            if torrent.status.checking and torrent.checked_at <= now:
+                torrent.status = _TrStatus()
+                torrent.percent_done = 1
+                torrent.changed_at = torrent.checked_at
+
+    def get_completed_torrents(self, **kwargs) -> List[_TrTorrent]:
+        self._call("get_completed_torrents")
+        return list(self.torrents.values())
+
+    def get_torrents(self, ids: List[str] = None, **kwargs):
+        self._call("get_torrents")
+        with self._lock:
+            self.refresh()
+            if ids is None:
+                return list(self.torrents.values()), False
+            return [self.torrents[i] for i in ids if i in self.torrents], False
+
+    def add_torrent(self, content: bytes, download_dir: str = None, is_paused: bool = False,
+                    labels: List[str] = None, **kwargs) -> Optional[_TrTorrent]:
+        self._call("add_torrent")
+        torrent = _TrTorrent(self._info_hash(content), download_dir, labels or [], self._total_size(content))
+        torrent.status = _TrStatus(stopped=True, checking=True)
+        torrent.percent_done = 0
+        torrent.checked_at = time.time() + self.recheck_time
+        with self._lock:
+            self.torrents[torrent.hashString] = torrent
+        return torrent
+
+    def recheck_torrents(self, ids: List[str] = None) -> bool:
+        self._call("recheck_torrents")
+        return True
+
+    def start_torrents(self, ids: List[str] = None) -> bool:
+        self._call("start_torrents")
+        with self._lock:
+            for torrent_hash in ids or []:
+                if torrent_hash in self.torrents:
+                    self.torrents[torrent_hash].status = _TrStatus(stopped=False)
+                    self.torrents[torrent_hash].changed_at = time.time()
+        return True
+
+    def delete_torrents(self, delete_file: bool = False, ids: List[str] = None) -> bool:
+        self._call("delete_torrents")
+        with self._lock:
+            for torrent_hash in ids or []:
+                if self.torrents.pop(torrent_hash, None):
+                    self.removed[torrent_hash] = time.time()
+        return True
+
+
+# ---------------------------------------------------------------------------
+# 合成 BT_backup 目录
+# ---------------------------------------------------------------------------
+
+def generate_backup(path: Path, count: int, missing_ratio: float, seed: int = 0) -> List[dict]:
+    """
+    生成 count 个 .torrent + .fastresume，按 missing_ratio 的比例去掉 announce
+    已存在相同数量的目录时直接复用
+    :return: 种子信息 [{"hash", "save_path", "labels", "category", "completion"}]
+    """
+    rnd = random.Random(seed)
+    marker = path / f".generated-{count}-{missing_ratio}-{seed}"
+    generate = not marker.exists()
+    if generate:
+        shutil.rmtree(path, ignore_errors=True)
+        path.mkdir(parents=True)
+    torrents = []
+    for i in range(count):
+        pieces = rnd.randint(1, 64)
+        info = {
+            "name": f"synthetic-{i}",
+            "piece length": 4 * 1024 * 1024,
+            "length": pieces * 4 * 1024 * 1024,
+            "pieces": rnd.randbytes(20 * pieces)
+        }
+        torrent_hash = hashlib.sha1(bencode(info)).hexdigest()
+        if generate:
+            main = {"info": info, "created by": "benchmark"}
+            if rnd.random() >= missing_ratio:
+                main["announce"] = f"http://tracker{i % 7}.example/announce"
+            (path / f"{torrent_hash}.torrent").write_bytes(bencode(main))
+            (path / f"{torrent_hash}.fastresume").write_bytes(bencode({
+                "trackers": [[f"http://tracker{i % 7}.example/announce"], ["http://backup.example/announce"]],
+                "save_path": f"/downloads/{i % 10}",
+                "qBt-category": "bench"
+            }))
+        torrents.append({
+            "hash": torrent_hash,
+            "save_path": f"/downloads/{i % 10}",
+            "labels": ["bench"] if i % 3 else [],
+            "category": "bench",
+            "completion": 1700000000 + i
+        })
+    if generate:
+        marker.touch()
+    return torrents
+
+
+def build_downloader(kind: str, torrents: List[dict], latency: float, recheck_time: float, capacity: int = 0,
+                     disk_rate: float = 0):
+    if kind == "qbittorrent":
+        return FakeQbittorrent([{
+            "hash": t["hash"],
+            "save_path": t["save_path"],
+            "tags": ",".join(t["labels"]),
+            "category": t["category"],
+            "completion_on": t["completion"],
+            "state": "uploading",
+            "size": 0,
+            "progress": 1
+        } for t in torrents], latency=latency, recheck_time=recheck_time, capacity=capacity, disk_rate=disk_rate)
+    return FakeTransmission([
+        _TrTorrent(t["hash"], t["save_path"], t["labels"], 0) for t in torrents
+    ], latency=latency, recheck_time=recheck_time, capacity=capacity)
+
+
+# ---------------------------------------------------------------------------
+# 基准
+# ---------------------------------------------------------------------------
+
+def peak_rss_mb() -> float:
+    # Linux 为 KB，macOS 为字节
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def run(args: argparse.Namespace, count: int, workdir: Path):
+    from torrenttransferray import TorrentTransferRay
+
+    backup_dir = workdir / f"BT_backup-{count}"
+    started = time.perf_counter()
+    torrents = generate_backup(backup_dir, count, args.missing_ratio)
+    generate_time = time.perf_counter() - started
+
+    source = build_downloader(args.source, torrents, args.latency / 1000, 0)
+    target = build_downloader(args.target, [], args.latency / 1000, args.recheck_time, args.capacity,
+                              args.disk_rate * 1024 * 1024)
+    del torrents
+    _DownloaderHelper.services = {
+        "source": _ServiceInfo("source", args.source, source),
+        "target": _ServiceInfo("target", args.target, target)
+    }
+    if args.cold:
+        shutil.rmtree(Path(sys.modules["app.core.config"].settings.PLUGIN_DATA_PATH), ignore_errors=True)
+    TorrentTransferRay._recheck_monitors.clear()
+    TorrentTransferRay._controllers.clear()
+    TorrentTransferRay._recheck_schedulers.clear()
+    if TorrentTransferRay._journal:
+        TorrentTransferRay._journal.close()
+        TorrentTransferRay._journal = None
+
+    plugin = TorrentTransferRay()
+    plugin.init_plugin({
+        "enabled": True,
+        "cron": "",
+        "fromdownloader": "source",
+        "todownloader": "target",
+        "fromtorrentpath": str(backup_dir),
+        "frompath": "/downloads",
+        "topath": "/data",
+        "transferemptylabel": True,
+        "autostart": True,
+        "skipverify": False,
+        "deletesource": args.delete_source,
+        "workers": args.workers,
+        "batchsize": args.batchsize,
+        "maxadds": args.max_adds,
+        "recheckquota": args.recheck_quota,
+        "incremental": args.incremental
+    })
+    rss_before = peak_rss_mb()
+
+    started = time.perf_counter()
+    transfer_started = time.time()
+    plugin.transfer()
+    transfer_time = time.perf_counter() - started
+
+    # 模拟调度器按监控给出的间隔检查校验任务
+    started = time.perf_counter()
+    monitor = TorrentTransferRay._recheck_monitors.get("target")
+    checks = 0
+    while monitor and monitor.pending and time.perf_counter() - started < args.recheck_timeout:
+        time.sleep(monitor.next_interval() if checks else 0)
+        plugin.check_recheck()
+        checks += 1
+    recheck_time = time.perf_counter() - started
+
+    runs = plugin.get_data("runs") or [{}]
+    counter = runs[-1].get("counter") or {}
+    phases = runs[-1].get("phases") or {}
+    print(f"\n== {count} 个种子  {args.source} -> {args.target}  延迟 {args.latency}ms  并发 {args.workers}")
+    print(f"生成目录        {generate_time:8.2f}s")
+    print(f"transfer        {transfer_time:8.2f}s  {counter.get('success', 0) / transfer_time:10.1f} 个/s  "
+          f"成功 {counter.get('success', 0)} 失败 {counter.get('fail', 0)} 跳过 {counter.get('skip', 0)}")
+    print(f"check_recheck   {recheck_time:8.2f}s  检查 {checks} 次，未完成 {len(monitor.pending) if monitor else 0}")
+    checked_at = sorted(getattr(target, "checked_at", []))
+    if checked_at:
+        print("校验完成        " + "  ".join(
+            f"{int(ratio * 100)}% {checked_at[max(int(len(checked_at) * ratio) - 1, 0)] - transfer_started:.1f}s"
+            for ratio in (0.25, 0.5, 0.75, 1)))
+    print(f"峰值内存        {peak_rss_mb():8.1f}MB（transfer 前 {rss_before:.1f}MB）")
+    print("阶段耗时        " + "  ".join(f"{name} {elapsed:.2f}s/{calls}"
+                                      for name, (elapsed, calls) in phases.items()))
+    print(f"源下载器请求    {source.calls}")
+    print(f"目的下载器请求  {target.calls}")
+    if runs[-1].get("adds"):
+        print(f"添加并发控制    {runs[-1]['adds']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TorrentTransferRay 离线基准")
+    parser.add_argument("--count", default="1000", help="种子数量，逗号分隔，如 1000,10000,100000")
+    parser.add_argument("--source", choices=["qbittorrent", "transmission"], default="qbittorrent")
+    parser.add_argument("--target", choices=["qbittorrent", "transmission"], default="qbittorrent")
+    parser.add_argument("--latency", type=float, default=0, help="每次下载器请求的延迟（毫秒）")
+    parser.add_argument("--recheck-time", type=float, default=1, help="目的下载器校验一个种子的耗时（秒）")
+    parser.add_argument("--disk-rate", type=float, default=0,
+                        help="目的 qBittorrent 的磁盘校验速度（MB/s），0 表示每个种子固定耗时 --recheck-time")
+    parser.add_argument("--recheck-quota", type=float, default=100, help="单个挂载点同时校验上限（GB），0 表示不限")
+    parser.add_argument("--recheck-timeout", type=float, default=120, help="等待校验完成的最长时间（秒）")
+    parser.add_argument("--missing-ratio", type=float, default=0.2, help="缺少 announce 的种子比例")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--batchsize", type=int, default=50)
+    parser.add_argument("--max-adds", type=int, default=8, help="添加种子并发上限")
+    parser.add_argument("--capacity", type=int, default=0, help="目的下载器同时处理的请求数，超出后延迟增加，0 表示不限")
+    parser.add_argument("--incremental", action="store_true", help="开启增量转移")
+    parser.add_argument("--delete-source", action="store_true", help="转移后删除源种子")
+    parser.add_argument("--cold", action="store_true", help="每轮前清空插件数据（fastresume 索引等）")
+    parser.add_argument("--workdir", help="合成目录的位置，默认使用临时目录；指定后可复用")
+    args = parser.parse_args()
+
+    workdir = Path(args.workdir) if args.workdir else Path(tempfile.mkdtemp(prefix="ttr-bench-"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    logging.basicConfig(level=logging.ERROR)
+    install_app_stubs(workdir / "moviepilot")
+    sys.path.insert(0, str(ROOT / "plugins.v2"))
+
+    for count in (int(c) for c in args.count.split(",") if c.strip()):
+        run(args, count, workdir)
+    if not args.workdir:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    os.environ.setdefault("TZ", "Asia/Shanghai")
+    main()
@@ -1,13 +1,15 @@
 import os
+import time
+import zlib
 from datetime import datetime, timedelta
+from itertools import chain
 from pathlib import Path
-from threading import Event
-from typing import Any, List, Dict, Tuple, Optional, Union
+from threading import Event, Lock
+from typing import Any, List, Dict, Tuple, Optional, Union, Set, Iterator
 
 import pytz
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
-from bencode import bdecode, bencode
 
 from app.core.config import settings
 from app.helper.downloader import DownloaderHelper
@@ -18,6 +20,11 @@ from app.modules.transmission import Transmission
 from app.plugins import _PluginBase
 from app.schemas import NotificationType, ServiceInfo
 from app.utils.string import StringUtils
+from .fastresume import FastresumeIndex
+from .journal import TransferJournal
+from .recheck import RecheckMonitor, RecheckScheduler
+from .utils import AimdController, BackupEntry, StagePipeline, TransferCounter, TransferItem, TransferMetrics, TransferRules, \
+    bencode_splice, bencode_string, get_info_hash, get_torrent_size, scan_backup_dirs, scan_torrent
 
 
 class TorrentTransferRay(_PluginBase):
@@ -28,7 +35,7 @@ class TorrentTransferRay(_PluginBase):
     # 插件图标
     plugin_icon = "seed.png"
     # 插件版本
-    plugin_version = "1.10.3"
+    plugin_version = "1.11.0"
     # 插件作者
     plugin_author = "jxxghp"
     # 作者主页
@@ -64,11 +71,41 @@ class TorrentTransferRay(_PluginBase):
     _skipverify = False
     _transferemptylabel = False
     _add_torrent_tags = None
+    _workers = 4
+    _batchsize = 50
+    _incremental = False
+    _maxadds = 8
+    _recheckinterval = 2
+    _recheckquota = 100
+    # 转移过滤规则
+    _rules: TransferRules = TransferRules()
     # 退出事件
     _event = Event()
-    # 待检查种子清单
-    _recheck_torrents = {}
+    # 转移任务锁，定时任务、立即运行与继续中断的转移不能同时进行
+    _transfer_lock = Lock()
+    # 校验任务监控：下载器名称 -> RecheckMonitor
+    _recheck_monitors: Dict[str, RecheckMonitor] = {}
+    # 转移日志，重启后继续未完成的转移
+    _journal: Optional[TransferJournal] = None
+    # 目的下载器负载控制：下载器名称-类型 -> AimdController
+    _controllers: Dict[str, AimdController] = {}
     _is_recheck_running = False
+    # 校验调度：下载器名称 -> RecheckScheduler
+    _recheck_schedulers: Dict[str, RecheckScheduler] = {}
+    # 保留的转移耗时记录数
+    _max_runs = 10
+    # 耗时统计的阶段名称
+    _phase_names = {
+        "list": "获取源种子",
+        "filter": "过滤",
+        "io": "文件读取",
+        "parse": "解析种子",
+        "hash": "查询目的种子",
+        "add": "添加种子",
+        "recheck": "校验",
+        "delete": "删除种子",
+        "history": "保存记录"
+    }
     # 任务标签
     _torrent_tags = []
 
@@ -97,9 +134,27 @@ class TorrentTransferRay(_PluginBase):
             self._transferemptylabel = config.get("transferemptylabel")
             self._add_torrent_tags = config.get("add_torrent_tags") or ""
             self._torrent_tags = self._add_torrent_tags.strip().split(",") if self._add_torrent_tags else []
+            self._workers = config.get("workers") or 4
+            self._batchsize = config.get("batchsize") or 50
+            self._incremental = config.get("incremental")
+            self._maxadds = config.get("maxadds") or 8
+            self._recheckinterval = config.get("recheckinterval") or 2
+            self._recheckquota = config.get("recheckquota")
+
+        # 预编译过滤规则
+        self._rules = TransferRules(nopaths=self._nopaths,
+                                    includecategory=self._includecategory,
+                                    nolabels=self._nolabels,
+                                    includelabels=self._includelabels,
+                                    transferemptylabel=self._transferemptylabel)
 
         # 停止现有任务
         self.stop_service()
+        # 上限可能已变化，重新学习下载器负载
+        self._controllers.clear()
+
+        # 重放转移日志，恢复未开始做种的校验任务
+        self.__restore_journal()
 
         # 启动定时任务 & 立即运行一次
         if self.get_state() or self._onlyonce:
@@ -114,9 +169,10 @@ class TorrentTransferRay(_PluginBase):
             # 定时服务
             self._scheduler = BackgroundScheduler(timezone=settings.TZ)
 
-            if self._autostart:
-                # 追加种子校验服务
-                self._scheduler.add_job(self.check_recheck, 'interval', minutes=0.5)
+            if any(monitor.pending for monitor in self._recheck_monitors.values()) \
+                    and (self._autostart or any(scheduler.hashes for scheduler in self._recheck_schedulers.values())):
+                # 继续检查未完成的校验任务，未开启自动开始时只继续排队的校验
+                self.__schedule_recheck(0)
 
             if self._onlyonce:
                 logger.info(f"转移做种服务启动，立即运行一次")
@@ -126,8 +182,14 @@ class TorrentTransferRay(_PluginBase):
                 self._onlyonce = False
                 config["onlyonce"] = self._onlyonce
                 self.update_config(config=config)
-            # 启动服务
-            if self._scheduler.get_jobs():
+            elif self.get_state() and self._journal and self._journal.unfinished \
+                    and not self._transfer_lock.locked():
+                logger.info(f"上次转移未完成，继续转移做种")
+                self._scheduler.add_job(self.transfer, 'date',
+                                        run_date=datetime.now(tz=pytz.timezone(settings.TZ)) + timedelta(
+                                            seconds=3))
+            # 启动服务，自动开始做种时校验任务会在转移后动态添加
+            if self._scheduler.get_jobs() or self._autostart:
                 self._scheduler.print_jobs()
                 self._scheduler.start()
 
@@ -428,6 +490,128 @@ class TorrentTransferRay(_PluginBase):
                             }
                         ]
                     },
+                    {
+                        'component': 'VRow',
+                        'content': [
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'workers',
+                                            'label': '转移并发数',
+                                            'type': 'number',
+                                            'placeholder': '4'
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'batchsize',
+                                            'label': '批量操作数量',
+                                            'type': 'number',
+                                            'placeholder': '50'
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VSwitch',
+                                        'props': {
+                                            'model': 'incremental',
+                                            'label': '增量转移',
+                                        }
+                                    }
+                                ]
+                            }
+                        ]
+                    },
+                    {
+                        'component': 'VRow',
+                        'content': [
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'maxadds',
+                                            'label': '添加种子并发上限',
+                                            'type': 'number',
+                                            'placeholder': '8',
+                                            'hint': '根据目的下载器的响应自动调整，不超过该值',
+                                            'persistent-hint': True
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'recheckinterval',
+                                            'label': '校验检查最短间隔（秒）',
+                                            'type': 'number',
+                                            'placeholder': '2',
+                                            'hint': '目的下载器响应变慢时自动延长',
+                                            'persistent-hint': True
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'recheckquota',
+                                            'label': '单个挂载点同时校验上限（GB）',
+                                            'type': 'number',
+                                            'placeholder': '100',
+                                            'hint': 'qbittorrent超出的种子排队校验，小种子优先，0为不限制',
+                                            'persistent-hint': True
+                                        }
+                                    }
+                                ]
+                            }
+                        ]
+                    },
                     {
                         'component': 'VRow',
                         'content': [
@@ -553,11 +737,122 @@ class TorrentTransferRay(_PluginBase):
             "autostart": True,
             "skipverify": False,
             "transferemptylabel": False,
-            "add_torrent_tags": "已整理,转移做种"
+            "add_torrent_tags": "已整理,转移做种",
+            "workers": 4,
+            "batchsize": 50,
+            "incremental": False,
+            "maxadds": 8,
+            "recheckinterval": 2,
+            "recheckquota": 100
         }
 
     def get_page(self) -> List[dict]:
-        pass
+        """
+        拼装插件详情页面，按时间倒序展示最近几次转移的各阶段耗时
+        """
+        runs = self.get_data(key="runs") or []
+        if not runs:
+            return [
+                {
+                    'component': 'div',
+                    'text': '暂无转移记录',
+                    'props': {
+                        'class': 'text-center',
+                    }
+                }
+            ]
+        items = []
+        for run in reversed(runs):
+            counter = run.get("counter") or {}
+            duration = run.get("duration") or 0
+            # 各阶段耗时，多线程阶段为各线程耗时之和
+            phase_rows = []
+            for name, (elapsed, count) in sorted(run.get("phases", {}).items(), key=lambda x: -x[1][0]):
+                phase_rows.append({
+                    'component': 'tr',
+                    'content': [
+                        {'component': 'td', 'text': self._phase_names.get(name, name)},
+                        {'component': 'td', 'text': f"{elapsed:.2f}s"},
+                        {'component': 'td', 'text': str(count)},
+                        {
+                            'component': 'td',
+                            'content': [
+                                {
+                                    'component': 'VProgressLinear',
+                                    'props': {
+                                        'model-value': min(elapsed / duration * 100, 100) if duration else 0,
+                                        'height': 8,
+                                        'rounded': True
+                                    }
+                                }
+                            ]
+                        }
+                    ]
+                })
+            rpc_text = "；".join(f"{name} {stat['count']}次 p50 {stat['p50'] * 1000:.0f}ms "
+                                f"p95 {stat['p95'] * 1000:.0f}ms"
+                                for name, stat in (run.get("rpc") or {}).items())
+            adds = run.get("adds")
+            if adds:
+                rpc_text += f"；添加并发 {adds.get('limit')}，减半 {adds.get('decreases')} 次，" \
+                            f"失败 {adds.get('errors')} 次，过慢 {adds.get('slow')} 次"
+            items.append({
+                'component': 'VTimelineItem',
+                'props': {
+                    'dot-color': 'error' if counter.get("fail") else 'primary',
+                    'size': 'small'
+                },
+                'content': [
+                    {
+                        'component': 'div',
+                        'props': {
+                            'class': 'text-subtitle-2'
+                        },
+                        'text': f"{datetime.fromtimestamp(run.get('start') or 0).strftime('%Y-%m-%d %H:%M:%S')}"
+                                f"  耗时 {duration:.1f}s"
+                    },
+                    {
+                        'component': 'div',
+                        'props': {
+                            'class': 'text-caption'
+                        },
+                        'text': f"总数：{counter.get('total', 0)}，成功：{counter.get('success', 0)}，"
+                                f"失败：{counter.get('fail', 0)}，跳过：{counter.get('skip', 0)}，"
+                                f"删除重复：{counter.get('del_dup', 0)}，"
+                                f"读取：{StringUtils.str_filesize(run.get('bytes_read') or 0)}"
+                    },
+                    {
+                        'component': 'div',
+                        'props': {
+                            'class': 'text-caption'
+                        },
+                        'text': rpc_text
+                    },
+                    {
+                        'component': 'VTable',
+                        'props': {
+                            'density': 'compact'
+                        },
+                        'content': [
+                            {
+                                'component': 'tbody',
+                                'content': phase_rows
+                            }
+                        ]
+                    }
+                ]
+            })
+        return [
+            {
+                'component': 'VTimeline',
+                'props': {
+                    'side': 'end',
+                    'density': 'compact',
+                    'align': 'start'
+                },
+                'content': items
+            }
+        ]
 
     def __validate_config(self) -> bool:
         """
@@ -583,6 +878,15 @@ class TorrentTransferRay(_PluginBase):
             return
         downloader = service.instance
         if self.downloader_helper.is_downloader("qbittorrent", service=service):
+            # 本地计算种子Hash，无需通过标签反查
+            torrent_hash = get_info_hash(content)
+            if torrent_hash:
+                state = downloader.add_torrent(content=content,
+                                               download_dir=save_path,
+                                               is_paused=True,
+                                               tag=self._torrent_tags,
+                                               is_skip_checking=self._skipverify)
+                return torrent_hash if state else None
             # 生成随机Tag
             tag = StringUtils.generate_random_str(10)
             state = downloader.add_torrent(content=content,
@@ -617,6 +921,15 @@ class TorrentTransferRay(_PluginBase):
         """
         开始转移做种
         """
+        if not self._transfer_lock.acquire(blocking=False):
+            logger.info("转移做种任务正在运行，跳过本次 ...")
+            return
+        try:
+            self.__transfer()
+        finally:
+            self._transfer_lock.release()
+
+    def __transfer(self):
         logger.info("开始转移做种任务 ...")
 
         if not self.__validate_config():
@@ -630,304 +943,763 @@ class TorrentTransferRay(_PluginBase):
         if not from_downloader or not to_downloader:
             return
 
-        torrents = from_downloader.get_completed_torrents()
-        if torrents:
-            logger.info(f"下载器 {from_service.name} 已完成种子数：{len(torrents)}")
-        else:
-            logger.info(f"下载器 {from_service.name} 没有已完成种子")
+        metrics = TransferMetrics()
+        journal = self.__open_journal()
+        if journal:
+            journal.begin(from_service.name, to_service.name)
+        # 转移上下文
+        context = {
+            "from_service": from_service,
+            "to_service": to_service,
+            "exist_hashes": set(),
+            "counter": TransferCounter(),
+            "batch": {
+                "duplicate": [],
+                "recheck": [],
+                "monitor": [],
+                "delete": [],
+                "history": []
+            },
+            # 增量索引：hash -> [结论, 完成时间, 特征值]
+            "index": self.__load_index(from_service) if self._incremental else None,
+            "new_index": {},
+            # fastresume索引，仅QB需要补充tracker
+            "fastresume": self.__open_fastresume_index(from_service),
+            # 种子目录扫描结果：hash -> BackupEntry
+            "backup": {},
+            "metrics": metrics,
+            "journal": journal
+        }
+        try:
+            # 先提交上次中断时未完成的操作
+            self.__resume_journal(context)
+            with metrics.phase("list", rpc=from_service.name):
+                torrents = from_downloader.get_completed_torrents()
+            if torrents:
+                logger.info(f"下载器 {from_service.name} 已完成种子数：{len(torrents)}")
+                self.__transfer_torrents(context, torrents)
+            else:
+                logger.info(f"下载器 {from_service.name} 没有已完成种子")
+        finally:
+            if context.get("index") is not None:
+                self.__save_index(context)
+            if context.get("fastresume"):
+                context["fastresume"].close()
+            # 中途停止时保留未完成状态，下次启动继续
+            if journal and not self._event.is_set():
+                journal.finish(self.__journal_required(to_service))
+            self.__save_run(context)
+        logger.info("转移做种任务执行完成")
+
+    def __open_fastresume_index(self, service: ServiceInfo) -> Optional[FastresumeIndex]:
+        """
+        打开源下载器的fastresume索引
+        """
+        if not self.downloader_helper.is_downloader("qbittorrent", service=service):
+            return None
+        try:
+            return FastresumeIndex(self.get_data_path() / "fastresume.db")
+        except Exception as e:
+            logger.error(f"打开fastresume索引失败，本次使用内存索引：{str(e)}")
+            return FastresumeIndex(":memory:")
+
+    def __open_journal(self) -> Optional[TransferJournal]:
+        """
+        打开转移日志，同一进程内只打开一次
+        """
+        if not TorrentTransferRay._journal:
+            try:
+                TorrentTransferRay._journal = TransferJournal(self.get_data_path() / "transfer.journal")
+            except Exception as e:
+                logger.error(f"打开转移日志失败，转移中断后将无法继续：{str(e)}")
+        return TorrentTransferRay._journal
+
+    def __journal_required(self, service: Optional[ServiceInfo]) -> Set[str]:
+        """
+        种子完成转移需要达到的状态
+        """
+        required = set()
+        if not self._skipverify and self.downloader_helper.is_downloader("qbittorrent", service=service):
+            required.add(TransferJournal.RECHECKING)
+        if self._autostart:
+            required.add(TransferJournal.STARTED)
+        if self._deletesource:
+            required.add(TransferJournal.DELETED)
+        return required
+
+    def __restore_journal(self):
+        """
+        重放转移日志，已添加并校验但未开始做种的种子重新加入校验监控
+        """
+        journal = self.__open_journal()
+        if not journal or not journal.run:
+            return
+        if journal.run.get("to") != self._todownloader:
+            return
+        service = self.downloader_helper.get_service(self._todownloader)
+        if not service:
+            return
+        hashes = set(journal.pending(TransferJournal.STARTED)) if self._autostart else set()
+        # 还没有开始校验的种子重新排队校验
+        if TransferJournal.RECHECKING in self.__journal_required(service):
+            queued = journal.pending(TransferJournal.RECHECKING)
+            scheduler = self.__get_recheck_scheduler(service)
+            for torrent_hash in queued:
+                scheduler.add(torrent_hash)
+            hashes |= set(queued)
+        if not hashes:
             return
+        logger.info(f"从转移日志恢复 {len(hashes)} 个待校验任务")
+        monitor = self._recheck_monitors.get(service.name)
+        if not monitor:
+            monitor = self._recheck_monitors[service.name] = RecheckMonitor(service.type)
+        monitor.add(list(hashes))
 
-        # 过滤种子，记录保存目录
-        trans_torrents = []
-        for torrent in torrents:
+    def __resume_journal(self, context: dict):
+        """
+        提交上次转移中断时已添加种子的后续操作：监控、删除源种子
+        未开始的校验在加载插件时已从日志恢复到校验调度，这里不再重复排队
+        """
+        journal: Optional[TransferJournal] = context.get("journal")
+        if not journal:
+            return
+        to_service: ServiceInfo = context.get("to_service")
+        batch: Dict[str, list] = context.get("batch")
+        required = self.__journal_required(to_service)
+
+        if TransferJournal.STARTED in required:
+            batch["monitor"].extend(journal.pending(TransferJournal.STARTED))
+        if TransferJournal.DELETED in required:
+            batch["delete"].extend(journal.pending(TransferJournal.DELETED))
+        if any(batch.values()):
+            logger.info(f"继续上次中断的转移：等待做种 {len(batch['monitor'])} 个，"
+                        f"删除源种子 {len(batch['delete'])} 个")
+            self.__flush_batch(context)
+
+    def __transfer_torrents(self, context: dict, torrents: list):
+        """
+        过滤并转移种子
+        """
+        to_service: ServiceInfo = context.get("to_service")
+        counter: TransferCounter = context.get("counter")
+
+        from_service: ServiceInfo = context.get("from_service")
+        # 需要读取文件状态的种子
+        hashes = {self.__get_hash(torrent, from_service.type) for torrent in torrents}
+        # 惰性过滤种子，过滤与转移同时进行
+        trans_torrents = self.__filter_torrents(context, torrents)
+        del torrents
+        first_item = next(trans_torrents, None)
+        if not first_item:
+            logger.info(f"没有需要转移的种子")
+            return
+
+        metrics: TransferMetrics = context.get("metrics")
+        # 一次性获取目的下载器中已有的种子hash，避免逐个查询
+        with metrics.phase("hash", rpc=to_service.name):
+            exist_hashes = self.__get_torrent_hashes(to_service)
+        if exist_hashes is None:
+            logger.error(f"获取下载器 {to_service.name} 种子列表失败，停止转移")
+            return
+        context["exist_hashes"] = exist_hashes
+        # 一次扫描种子目录，后续检查文件是否存在只需查表
+        with metrics.phase("io"):
+            context["backup"] = scan_backup_dirs([self._fromtorrentpath], hashes=hashes,
+                                                 workers=self.__get_workers())
+        del hashes
+        # 读取解析 -> 添加到目的下载器 -> 校验、删除源种子、记录历史
+        workers = self.__get_workers()
+        pipeline = StagePipeline(stages=[
+            ("transfer-prepare", lambda item: self.__prepare_torrent(context, item), workers),
+            ("transfer-add", lambda task: self.__add_torrent(context, task), self.__get_max_adds()),
+            ("transfer-finish", lambda task: self.__finish_torrent(context, task), 1)
+        ], queue_size=workers * 2, event=self._event,
+            on_error=lambda name, item, err: self.__stage_failed(context, name))
+        pipeline.run(chain([first_item], trans_torrents))
+        # 提交剩余的批量操作
+        self.__flush_batch(context)
+        if self._event.is_set():
+            logger.info(f"转移服务停止")
+            return
+        logger.info(f"需要转移的种子数：{counter.total}")
+
+        # 触发校验任务
+        if counter.success > 0 and self._autostart:
+            self.check_recheck()
+
+        # 发送通知
+        if self._notify:
+            self.post_message(
+                mtype=NotificationType.SiteMessage,
+                title="【转移做种任务执行完成】",
+                text=f"总数：{counter.total}，成功：{counter.success}，失败：{counter.fail}，"
+                     f"跳过：{counter.skip}，删除重复：{counter.del_dup}"
+            )
+
+    def __filter_torrents(self, context: dict, torrents: list) -> Iterator[TransferItem]:
+        """
+        逐个过滤种子，仅保留转移所需的字段
+        """
+        counter: TransferCounter = context.get("counter")
+        metrics: TransferMetrics = context.get("metrics")
+
+        # 倒序后从尾部弹出，已过滤的种子对象可及时释放
+        torrents.reverse()
+        while torrents:
             if self._event.is_set():
-                logger.info(f"转移服务停止")
                 return
+            torrent = torrents.pop()
+            with metrics.phase("filter"):
+                item = self.__filter_torrent(context, torrent)
+            if item:
+                # 转移数据
+                counter.incr("total")
+                yield item
+
+    def __filter_torrent(self, context: dict, torrent: Any) -> Optional[TransferItem]:
+        """
+        过滤单个种子，不需要转移时返回None
+        """
+        service: ServiceInfo = context.get("from_service")
+        index: Optional[Dict[str, list]] = context.get("index")
+        new_index: Dict[str, list] = context.get("new_index")
+
+        # 获取种子hash
+        hash_str = self.__get_hash(torrent, service.type)
+        # 获取保存路径
+        save_path = self.__get_save_path(torrent, service.type)
+        # 获取种子标签
+        torrent_labels = self.__get_label(torrent, service.type)
+        # 获取种子分类
+        torrent_category = self.__get_category(torrent, service.type)
+        # 完成时间及特征值，用于增量判断
+        completion = self.__get_completion_time(torrent, service.type)
+        signature = zlib.crc32(
+            f"{save_path}|{','.join(sorted(torrent_labels or []))}|{torrent_category}".encode())
+
+        # 增量模式下跳过上次已处理且未变化的种子
+        if index is not None:
+            entry = index.get(hash_str)
+            if entry and entry[1:] == [completion, signature]:
+                new_index[hash_str] = entry
+                return None
+
+        # 按预编译的规则过滤
+        skip_reason = self._rules.match(save_path=save_path,
+                                        labels=torrent_labels,
+                                        category=torrent_category)
+        if skip_reason:
+            logger.info(f"种子 {hash_str} {skip_reason}，跳过 ...")
+            if index is not None:
+                new_index[hash_str] = ["skip", completion, signature]
+            return None
+
+        return TransferItem(hash_str=hash_str, save_path=save_path,
+                            completion=completion, signature=signature)
+
+    def __load_index(self, service: ServiceInfo) -> Dict[str, list]:
+        """
+        读取增量索引，过滤规则变化时重新全量检查
+        """
+        index = self.get_data(key=f"index-{service.name}") or {}
+        if index.get("rules") != self._rules.fingerprint:
+            if index:
+                logger.info(f"过滤规则已变化，重新检查下载器 {service.name} 的全部种子")
+            return {}
+        return index.get("torrents") or {}
+
+    def __save_index(self, context: dict):
+        """
+        保存增量索引，中途停止时保留未检查到的旧记录
+        """
+        service: ServiceInfo = context.get("from_service")
+        torrents = context.get("new_index")
+        if self._event.is_set():
+            torrents = {**context.get("index"), **torrents}
+        self.save_data(key=f"index-{service.name}", value={
+            "rules": self._rules.fingerprint,
+            "torrents": torrents
+        })
+
+    @staticmethod
+    def __mark_done(context: dict, torrent_item: TransferItem):
+        """
+        记录已转移或目的下载器中已存在的种子
+        """
+        if context.get("index") is not None:
+            context.get("new_index")[torrent_item.hash] = ["done", torrent_item.completion, torrent_item.signature]
+
+    def __get_workers(self) -> int:
+        """
+        获取转移并发数
+        """
+        try:
+            return min(max(int(self._workers), 1), 32)
+        except (TypeError, ValueError):
+            return 4
+
+    def __get_max_adds(self) -> int:
+        """
+        获取添加种子的并发上限
+        """
+        try:
+            return min(max(int(self._maxadds), 1), 32)
+        except (TypeError, ValueError):
+            return 8
+
+    def __get_recheck_interval(self) -> float:
+        """
+        获取校验检查的最短间隔
+        """
+        try:
+            return min(max(float(self._recheckinterval), RecheckMonitor.MIN_INTERVAL), RecheckMonitor.MAX_INTERVAL)
+        except (TypeError, ValueError):
+            return RecheckMonitor.MIN_INTERVAL
 
-            # 获取种子hash
-            hash_str = self.__get_hash(torrent, from_service.type)
-            # 获取保存路径
-            save_path = self.__get_save_path(torrent, from_service.type)
-
-            if self._nopaths and save_path:
-                # 过滤不需要转移的路径
-                nopath_skip = False
-                for nopath in self._nopaths.split('\n'):
-                    if os.path.normpath(save_path).startswith(os.path.normpath(nopath)):
-                        logger.info(f"种子 {hash_str} 保存路径 {save_path} 不需要转移，跳过 ...")
-                        nopath_skip = True
-                        break
-                if nopath_skip:
-                    continue
-
-            # 获取种子标签
-            torrent_labels = self.__get_label(torrent, from_service.type)
-            # 获取种子分类
-            torrent_category = self.__get_category(torrent, from_service.type)
-            # 种子为无标签,则进行规范化
-            is_torrent_labels_empty = torrent_labels == [''] or torrent_labels == [] or torrent_labels is None
-            if is_torrent_labels_empty:
-                torrent_labels = []
-
-            # 如果分类项存在数值，则进行判断
-            if self._includecategory:
-                # 排除未标记的分类
-                if torrent_category not in self._includecategory.split(','):
-                    logger.info(f"种子 {hash_str} 不含有转移分类 {self._includecategory}，跳过 ...")
-                    continue
-            # 根据设置决定是否转移无标签的种子
-            if is_torrent_labels_empty:
-                if not self._transferemptylabel:
-                    continue
+    def __get_controller(self, service: ServiceInfo, kind: str) -> AimdController:
+        """
+        获取下载器的负载控制，add控制同时添加的种子数，poll控制查询种子状态的频率
+        """
+        key = f"{service.name}-{kind}"
+        controller = self._controllers.get(key)
+        if not controller:
+            if kind == "add":
+                max_adds = self.__get_max_adds()
+                controller = AimdController(limit_max=max_adds, initial=min(self.__get_workers(), max_adds))
             else:
-                # 排除含有不转移的标签
-                if self._nolabels:
-                    is_skip = False
-                    for label in self._nolabels.split(','):
-                        if label in torrent_labels:
-                            logger.info(f"种子 {hash_str} 含有不转移标签 {label}，跳过 ...")
-                            is_skip = True
-                            break
-                    if is_skip:
-                        continue
-                # 排除不含有转移标签的种子
-                if self._includelabels:
-                    is_skip = False
-                    for label in self._includelabels.split(','):
-                        if label not in torrent_labels:
-                            logger.info(f"种子 {hash_str} 不含有转移标签 {label}，跳过 ...")
-                            is_skip = True
-                            break
-                    if is_skip:
-                        continue
-
-            # 添加转移数据
-            trans_torrents.append({
-                "hash": hash_str,
-                "save_path": save_path,
-                "torrent": torrent
-            })
+                controller = AimdController(limit_max=8)
+            controller = self._controllers.setdefault(key, controller)
+        return controller
 
-        # 开始转移任务
-        if trans_torrents:
-            logger.info(f"需要转移的种子数：{len(trans_torrents)}")
-            # 记数
-            total = len(trans_torrents)
-            # 总成功数
-            success = 0
-            # 总失败数
-            fail = 0
-            # 跳过数
-            skip = 0
-            # 删除重复数
-            del_dup = 0
-
-            for torrent_item in trans_torrents:
-                # 检查种子文件是否存在
-                torrent_file = Path(self._fromtorrentpath) / f"{torrent_item.get('hash')}.torrent"
-                if not torrent_file.exists():
-                    logger.error(f"种子文件不存在：{torrent_file}")
-                    # 失败计数
-                    fail += 1
-                    continue
-
-                # 查询hash值是否已经在目的下载器中
-                torrent_info, _ = to_downloader.get_torrents(ids=[torrent_item.get('hash')])
-                if torrent_info:
-                    # 删除重复的源种子，不能删除文件！
-                    if self._deleteduplicate:
-                        logger.info(f"删除重复的源下载器任务（不含文件）：{torrent_item.get('hash')} ...")
-                        to_downloader.delete_torrents(delete_file=False, ids=[torrent_item.get('hash')])
-                        del_dup += 1
-                    else:
-                        logger.info(f"{torrent_item.get('hash')} 已在目的下载器中，跳过 ...")
-                        # 跳过计数
-                        skip += 1
-                    continue
-
-                # 转换保存路径
-                download_dir = self.__convert_save_path(torrent_item.get('save_path'),
-                                                        self._frompath,
-                                                        self._topath)
-                if not download_dir:
-                    logger.error(f"转换保存路径失败：{torrent_item.get('save_path')}")
-                    # 失败计数
-                    fail += 1
-                    continue
-
-                # 如果源下载器是QB检查是否有Tracker，没有的话额外获取
-                if self.downloader_helper.is_downloader("qbittorrent", service=from_service):
-                    # 读取种子内容、解析种子文件
-                    content = torrent_file.read_bytes()
-                    if not content:
-                        logger.warn(f"读取种子文件失败：{torrent_file}")
-                        fail += 1
-                        continue
-                    # 读取trackers
+    def __get_batch_size(self) -> int:
+        """
+        获取批量操作数量
+        """
+        try:
+            return max(int(self._batchsize), 1)
+        except (TypeError, ValueError):
+            return 50
+
+    @staticmethod
+    def __stage_failed(context: dict, stage: str):
+        """
+        读取解析、添加阶段出错的种子计入失败，提交阶段出错时种子已计入成功
+        """
+        if stage != "transfer-finish":
+            context.get("counter").incr("fail")
+
+    def __prepare_torrent(self, context: dict, torrent_item: TransferItem) -> Optional[dict]:
+        """
+        转移流水线：检查并读取种子文件，必要时补充tracker信息
+        """
+        from_service: ServiceInfo = context.get("from_service")
+        counter: TransferCounter = context.get("counter")
+        metrics: TransferMetrics = context.get("metrics")
+
+        # 检查种子文件是否存在，使用开始转移时的目录扫描结果
+        backup: Optional[BackupEntry] = context.get("backup").get(torrent_item.hash)
+        torrent_file = Path(backup.directory if backup else self._fromtorrentpath) / f"{torrent_item.hash}.torrent"
+        if not backup or not backup.has_torrent:
+            logger.error(f"种子文件不存在：{torrent_file}")
+            # 失败计数
+            counter.incr("fail")
+            return None
+
+        # 查询hash值是否已经在目的下载器中
+        journal: Optional[TransferJournal] = context.get("journal")
+        if torrent_item.hash in context.get("exist_hashes"):
+            # 上次转移在添加后、记录前中断，继续完成后续操作
+            if journal and journal.states(torrent_item.hash) == {TransferJournal.PLANNED}:
+                logger.info(f"{torrent_item.hash} 已在上次中断的转移中添加，继续转移 ...")
+                journal.record(TransferJournal.ADDED, [torrent_item.hash])
+                return {
+                    "hash": torrent_item.hash,
+                    "item": torrent_item,
+                    "download_id": torrent_item.hash
+                }
+            # 删除重复的源种子，交由后续阶段批量处理
+            if self._deleteduplicate:
+                return {
+                    "hash": torrent_item.hash,
+                    "item": torrent_item,
+                    "duplicate": True
+                }
+            logger.info(f"{torrent_item.hash} 已在目的下载器中，跳过 ...")
+            # 跳过计数
+            counter.incr("skip")
+            self.__mark_done(context, torrent_item)
+            return None
+
+        # 转换保存路径
+        download_dir = self.__convert_save_path(torrent_item.save_path,
+                                                self._frompath,
+                                                self._topath)
+        if not download_dir:
+            logger.error(f"转换保存路径失败：{torrent_item.save_path}")
+            # 失败计数
+            counter.incr("fail")
+            return None
+
+        # 读取种子内容
+        with metrics.phase("io"):
+            content = torrent_file.read_bytes()
+        metrics.add_bytes(len(content))
+        if not content:
+            logger.warn(f"读取种子文件失败：{torrent_file}")
+            counter.incr("fail")
+            return None
+
+        # 如果源下载器是QB检查是否有Tracker，没有的话额外获取
+        if self.downloader_helper.is_downloader("qbittorrent", service=from_service):
+            # 只扫描顶层字段读取tracker，不解码info
+            try:
+                with metrics.phase("parse"):
+                    main_announce = bencode_string(content, scan_torrent(content).get(b"announce"))
+            except Exception as err:
+                logger.warn(f"解析种子文件 {torrent_file} 失败：{str(err)}")
+                counter.incr("fail")
+                return None
+
+            if not main_announce:
+                logger.info(f"{torrent_item.hash} 未发现tracker信息，尝试补充tracker信息...")
+                # 从fastresume索引中读取trackers，索引过期时才解析文件
+                fastresume_file = Path(backup.directory) / f"{torrent_item.hash}.fastresume"
+                fastresume_index: FastresumeIndex = context.get("fastresume")
+                with metrics.phase("parse"):
+                    fastresume = fastresume_index.lookup(torrent_item.hash, fastresume_file,
+                                                         mtime=backup.fastresume_mtime) \
+                        if backup.has_fastresume else None
+                if not fastresume:
+                    logger.warn(f"fastresume文件不存在或无法解析：{fastresume_file}")
+                    counter.incr("fail")
+                    return None
+                fastresume_trackers = [tier for tier in fastresume[0] if tier]
+                if fastresume_trackers:
+                    trackers = {b"announce": fastresume_trackers[0][0]}
+                    # 保留其他tracker，避免单一tracker无法连接
+                    if len(fastresume_trackers) > 1 or len(fastresume_trackers[0]) > 1:
+                        trackers[b"announce-list"] = fastresume_trackers
+                    # 直接写入原始种子内容，info保持不变，无需重新编码和临时文件
                     try:
-                        torrent_main = bdecode(content)
-                        main_announce = torrent_main.get('announce')
+                        with metrics.phase("parse"):
+                            content = bencode_splice(content, trackers)
                     except Exception as err:
-                        logger.warn(f"解析种子文件 {torrent_file} 失败：{str(err)}")
-                        fail += 1
-                        continue
-
-                    if not main_announce:
-                        logger.info(f"{torrent_item.get('hash')} 未发现tracker信息，尝试补充tracker信息...")
-                        # 读取fastresume文件
-                        fastresume_file = Path(self._fromtorrentpath) / f"{torrent_item.get('hash')}.fastresume"
-                        if not fastresume_file.exists():
-                            logger.warn(f"fastresume文件不存在：{fastresume_file}")
-                            fail += 1
-                            continue
-                        # 尝试补充trackers
-                        try:
-                            # 解析fastresume文件
-                            fastresume = fastresume_file.read_bytes()
-                            torrent_fastresume = bdecode(fastresume)
-                            # 读取trackers
-                            fastresume_trackers = torrent_fastresume.get('trackers')
-                            if isinstance(fastresume_trackers, list) \
-                                    and len(fastresume_trackers) > 0 \
-                                    and fastresume_trackers[0]:
-                                # 重新赋值
-                                torrent_main['announce'] = fastresume_trackers[0][0]
-                                # 保留其他tracker，避免单一tracker无法连接
-                                if len(fastresume_trackers) > 1 or len(fastresume_trackers[0]) > 1:
-                                    torrent_main['announce-list'] = fastresume_trackers
-                                # 替换种子文件路径
-                                torrent_file = settings.TEMP_PATH / f"{torrent_item.get('hash')}.torrent"
-                                # 编码并保存到临时文件
-                                torrent_file.write_bytes(bencode(torrent_main))
-                        except Exception as err:
-                            logger.error(f"解析fastresume文件 {fastresume_file} 出错：{str(err)}")
-                            fail += 1
-                            continue
-
-                # 发送到另一个下载器中下载：默认暂停、传输下载路径、关闭自动管理模式
-                logger.info(f"添加转移做种任务到下载器 {to_service.name}：{torrent_file}")
+                        logger.error(f"补充种子文件 {torrent_file} 的tracker出错：{str(err)}")
+                        counter.incr("fail")
+                        return None
+
+        # 添加前记录，中断后可据此识别已添加的种子
+        if journal:
+            journal.record(TransferJournal.PLANNED, [torrent_item.hash])
+        # 种子数据总大小，用于安排校验
+        with metrics.phase("parse"):
+            size = get_torrent_size(content)
+        return {
+            "hash": torrent_item.hash,
+            "item": torrent_item,
+            "torrent_file": torrent_file,
+            "content": content,
+            "size": size,
+            "download_dir": download_dir
+        }
+
+    def __add_torrent(self, context: dict, task: dict) -> Optional[dict]:
+        """
+        转移流水线：添加种子到目的下载器
+        """
+        if task.get("duplicate") or task.get("download_id"):
+            return task
+        to_service: ServiceInfo = context.get("to_service")
+        counter: TransferCounter = context.get("counter")
+        torrent_file = task.get("torrent_file")
+
+        # 发送到另一个下载器中下载：默认暂停、传输下载路径、关闭自动管理模式
+        logger.info(f"添加转移做种任务到下载器 {to_service.name}：{torrent_file}")
+        metrics: TransferMetrics = context.get("metrics")
+        # 按目的下载器的响应情况限制同时添加的数量
+        controller = self.__get_controller(to_service, "add")
+        controller.acquire()
+        started = time.perf_counter()
+        # 只有异常和延迟视为过载，种子无效、被拒绝等与负载无关的失败不减少并发
+        raised = True
+        try:
+            with metrics.phase("add", rpc=to_service.name):
                 download_id = self.__download(service=to_service,
-                                              content=torrent_file.read_bytes(),
-                                              save_path=download_dir)
-                if not download_id:
-                    # 下载失败
-                    fail += 1
-                    logger.error(f"添加下载任务失败：{torrent_file}")
-                    continue
-                else:
-                    # 下载成功
-                    logger.info(f"成功添加转移做种任务，种子文件：{torrent_file}")
-
-                    # TR会自动校验，QB需要手动校验
-                    if self.downloader_helper.is_downloader("qbittorrent", service=to_service):
-                        if self._skipverify:
-                            if self._autostart:
-                                logger.info(f"{download_id} 跳过校验，开启自动开始，注意观察种子的完整性")
-                                self.__add_recheck_torrents(to_service, download_id)
-                            else:
-                                # 跳过校验
-                                logger.info(f"{download_id} 跳过校验，请自行检查手动开始任务...")
-                        else:
-                            logger.info(f"qbittorrent 开始校验 {download_id} ...")
-                            to_downloader.recheck_torrents(ids=[download_id])
-                            self.__add_recheck_torrents(to_service, download_id)
-                    else:
-                        self.__add_recheck_torrents(to_service, download_id)
-
-                    # 删除源种子，不能删除文件！
-                    if self._deletesource:
-                        logger.info(f"删除源下载器任务（不含文件）：{torrent_item.get('hash')} ...")
-                        from_downloader.delete_torrents(delete_file=False, ids=[torrent_item.get('hash')])
-
-                    # 成功计数
-                    success += 1
-                    # 插入转种记录
-                    history_key = f"{from_service.name}-{torrent_item.get('hash')}"
-                    self.save_data(key=history_key,
-                                   value={
-                                       "to_download": to_service.name,
-                                       "to_download_id": download_id,
-                                       "delete_source": self._deletesource,
-                                       "delete_duplicate": self._deleteduplicate,
-                                   })
-            # 触发校验任务
-            if success > 0 and self._autostart:
-                self.check_recheck()
-
-            # 发送通知
-            if self._notify:
-                self.post_message(
-                    mtype=NotificationType.SiteMessage,
-                    title="【转移做种任务执行完成】",
-                    text=f"总数：{total}，成功：{success}，失败：{fail}，跳过：{skip}，删除重复：{del_dup}"
-                )
+                                              content=task.pop("content"),
+                                              save_path=task.get("download_dir"))
+            raised = False
+        finally:
+            controller.release(time.perf_counter() - started, ok=not raised)
+        if not download_id:
+            # 下载失败
+            counter.incr("fail")
+            logger.error(f"添加下载任务失败：{torrent_file}")
+            return None
+        # 下载成功
+        logger.info(f"成功添加转移做种任务，种子文件：{torrent_file}")
+        context.get("exist_hashes").add(download_id)
+        task["download_id"] = download_id
+        if context.get("journal"):
+            context.get("journal").record(TransferJournal.ADDED, [task.get("hash")])
+        return task
+
+    def __finish_torrent(self, context: dict, task: dict):
+        """
+        转移流水线：收集校验、删除源种子及转移历史，达到批量大小后统一提交
+        """
+        from_service: ServiceInfo = context.get("from_service")
+        to_service: ServiceInfo = context.get("to_service")
+        counter: TransferCounter = context.get("counter")
+        batch: Dict[str, list] = context.get("batch")
+
+        if task.get("duplicate"):
+            batch["duplicate"].append(task.get("hash"))
+            counter.incr("del_dup")
+            self.__mark_done(context, task.get("item"))
         else:
-            logger.info(f"没有需要转移的种子")
-        logger.info("转移做种任务执行完成")
+            download_id = task.get("download_id")
+            # TR会自动校验，QB需要手动校验
+            if self.downloader_helper.is_downloader("qbittorrent", service=to_service):
+                if self._skipverify:
+                    if self._autostart:
+                        logger.info(f"{download_id} 跳过校验，开启自动开始，注意观察种子的完整性")
+                        batch["monitor"].append(download_id)
+                    else:
+                        # 跳过校验
+                        logger.info(f"{download_id} 跳过校验，请自行检查手动开始任务...")
+                else:
+                    batch["recheck"].append((download_id, task.get("size"), task.get("download_dir")))
+                    batch["monitor"].append(download_id)
+            else:
+                batch["monitor"].append(download_id)
+
+            # 删除源种子，不能删除文件！
+            if self._deletesource:
+                batch["delete"].append(task.get('hash'))
+
+            # 成功计数
+            counter.incr("success")
+            self.__mark_done(context, task.get("item"))
+            # 转种记录
+            batch["history"].append((f"{from_service.name}-{task.get('hash')}", {
+                "to_download": to_service.name,
+                "to_download_id": download_id,
+                "delete_source": self._deletesource,
+                "delete_duplicate": self._deleteduplicate,
+            }))
+
+        if max(len(items) for items in batch.values()) >= self.__get_batch_size():
+            self.__flush_batch(context)
+
+    def __flush_batch(self, context: dict):
+        """
+        批量提交重复删除、校验、源种子删除及转移历史
+        """
+        from_service: ServiceInfo = context.get("from_service")
+        to_service: ServiceInfo = context.get("to_service")
+        batch: Dict[str, list] = context.get("batch")
+        metrics: TransferMetrics = context.get("metrics")
+        journal: Optional[TransferJournal] = context.get("journal")
+
+        # 删除重复的源种子，不能删除文件！
+        if batch["duplicate"]:
+            logger.info(f"删除重复的源下载器任务（不含文件）：{len(batch['duplicate'])} 个 ...")
+            with metrics.phase("delete", rpc=to_service.name):
+                to_service.instance.delete_torrents(delete_file=False, ids=batch["duplicate"])
+        # QB需要手动校验，按挂载点排队，额度内的立即开始
+        if batch["recheck"]:
+            scheduler = self.__get_recheck_scheduler(to_service)
+            for download_id, size, download_dir in batch["recheck"]:
+                scheduler.add(download_id, size, download_dir)
+            self.__dispatch_recheck(to_service, metrics)
+        # 开启自动开始时检查校验结果，否则只跟踪排队校验的种子以便释放额度
+        monitor_ids = batch["monitor"] if self._autostart else [download_id for download_id, _, _ in batch["recheck"]]
+        if monitor_ids:
+            self.__add_recheck_torrents(to_service, monitor_ids)
+        # 删除源种子，不能删除文件！
+        if batch["delete"]:
+            logger.info(f"删除源下载器任务（不含文件）：{len(batch['delete'])} 个 ...")
+            with metrics.phase("delete", rpc=from_service.name):
+                from_service.instance.delete_torrents(delete_file=False, ids=batch["delete"])
+            if journal:
+                journal.record(TransferJournal.DELETED, batch["delete"])
+        # 插入转种记录
+        if batch["history"]:
+            with metrics.phase("history"):
+                for history_key, history in batch["history"]:
+                    self.save_data(key=history_key, value=history)
+        if journal:
+            journal.sync()
+
+        for items in batch.values():
+            items.clear()
+
+    def __save_run(self, context: dict):
+        """
+        保存本次转移的耗时统计，只保留最近的记录
+        """
+        metrics: TransferMetrics = context.get("metrics")
+        runs = self.get_data(key="runs") or []
+        run = metrics.to_dict(context.get("counter"))
+        controller = self._controllers.get(f"{context.get('to_service').name}-add")
+        if controller:
+            run["adds"] = controller.to_dict()
+            logger.info(f"下载器 {context.get('to_service').name} 添加并发 {run['adds']['limit']}，"
+                        f"减半 {run['adds']['decreases']} 次")
+        runs.append(run)
+        self.save_data(key="runs", value=runs[-self._max_runs:])
+
+    def __get_torrent_hashes(self, service: ServiceInfo) -> Optional[Set[str]]:
+        """
+        获取下载器中全部种子的hash集合，查询失败时返回None
+        """
+        started = time.perf_counter()
+        torrents, error = service.instance.get_torrents()
+        self.__get_controller(service, "poll").record(time.perf_counter() - started, ok=not error)
+        if error:
+            return None
+        return {self.__get_hash(torrent, service.type) for torrent in torrents or []}
 
-    def __add_recheck_torrents(self, service: ServiceInfo, download_id: str):
-        # 追加校验任务
-        logger.info(f"添加校验检查任务：{download_id} ...")
-        if not self._recheck_torrents.get(service.name):
-            self._recheck_torrents[service.name] = []
-        self._recheck_torrents[service.name].append(download_id)
+    def __add_recheck_torrents(self, service: ServiceInfo, download_ids: List[str]):
+        """
+        添加待校验种子并尽快开始检查
+        """
+        monitor = self._recheck_monitors.get(service.name)
+        if not monitor:
+            monitor = self._recheck_monitors[service.name] = RecheckMonitor(service.type)
+        monitor.add(download_ids)
+        self.__schedule_recheck(self.__get_recheck_interval())
 
-    def check_recheck(self):
+    def __get_recheck_quota(self) -> int:
+        """
+        获取单个挂载点同时校验的字节数上限，0表示不限制
+        """
+        if self._recheckquota is None or self._recheckquota == "":
+            return 100 * 1024 ** 3
+        try:
+            return max(int(float(self._recheckquota) * 1024 ** 3), 0)
+        except (TypeError, ValueError):
+            return 100 * 1024 ** 3
+
+    def __get_recheck_scheduler(self, service: ServiceInfo) -> RecheckScheduler:
         """
-        定时检查下载器中种子是否校验完成，校验完成且完整的自动开始辅种
+        获取下载器的校验调度，按当前配置更新额度
         """
-        if not self._recheck_torrents:
+        scheduler = self._recheck_schedulers.get(service.name)
+        if not scheduler:
+            scheduler = self._recheck_schedulers.setdefault(service.name, RecheckScheduler())
+        scheduler.quota = self.__get_recheck_quota()
+        return scheduler
+
+    def __dispatch_recheck(self, service: ServiceInfo, metrics: Optional[TransferMetrics] = None):
+        """
+        开始校验调度中额度内的种子
+        """
+        scheduler = self._recheck_schedulers.get(service.name)
+        if not scheduler:
             return
+        hashes = scheduler.take()
+        if not hashes:
+            return
+        logger.info(f"qbittorrent 开始校验 {len(hashes)} 个任务，排队 {scheduler.waiting} 个 ...")
+        started = time.perf_counter()
+        service.instance.recheck_torrents(ids=hashes)
+        if metrics:
+            metrics.add("recheck", time.perf_counter() - started, rpc=service.name)
+        if self._journal:
+            self._journal.record(TransferJournal.RECHECKING, hashes)
+
+    def __schedule_recheck(self, delay: float):
+        """
+        安排下次检查校验任务，没有待校验种子时不再安排，已安排更早的检查时保留
+        """
+        if not self._scheduler:
+            return
+        try:
+            run_date = datetime.now(tz=pytz.timezone(settings.TZ)) + timedelta(seconds=delay)
+            job = self._scheduler.get_job("check_recheck")
+            # 调度器启动前的任务没有next_run_time
+            next_run_time = getattr(job, "next_run_time", None) if job else None
+            if not next_run_time or next_run_time > run_date:
+                self._scheduler.add_job(self.check_recheck, 'date', run_date=run_date,
+                                        id="check_recheck", replace_existing=True)
+            # 定时转移由主程序调度，插件调度器可能尚未启动
+            if not self._scheduler.running:
+                self._scheduler.start()
+        except Exception as e:
+            logger.error(f"安排校验检查任务失败：{str(e)}")
+
+    def check_recheck(self):
+        """
+        检查下载器中种子是否校验完成，校验完成且完整的自动开始辅种
+        根据剩余校验量安排下次检查，没有待校验种子时停止
+        """
         if not self._todownloader:
             return
         if self._is_recheck_running:
             return
 
+        # 需要检查的种子
+        monitor = self._recheck_monitors.get(self._todownloader)
+        if not monitor or not monitor.pending:
+            return
+
         # 校验下载器
         to_service = self.service_info(self._todownloader)
         to_downloader: Optional[Union[Qbittorrent, Transmission]] = to_service.instance if to_service else None
 
         if not to_downloader:
+            self.__schedule_recheck(RecheckMonitor.MAX_INTERVAL)
             return
 
-        # 需要检查的种子
-        recheck_torrents = self._recheck_torrents.get(to_service.name, [])
-        if not recheck_torrents:
-            return
-
-        logger.info(f"开始检查下载器 {to_service.name} 的校验任务 ...")
+        logger.debug(f"开始检查下载器 {to_service.name} 的校验任务 ...")
 
+        controller = self.__get_controller(to_service, "poll")
         # 运行状态
         self._is_recheck_running = True
-
-        torrents, _ = to_downloader.get_torrents(ids=recheck_torrents)
-        if torrents:
-            # 可做种的种子
-            can_seeding_torrents = []
-            for torrent in torrents:
-                # 获取种子hash
-                hash_str = self.__get_hash(torrent, to_service.type)
-                # 判断是否可做种
-                if self.__can_seeding(torrent, to_service.type):
-                    can_seeding_torrents.append(hash_str)
-
-            if can_seeding_torrents:
+        try:
+            started = time.perf_counter()
+            can_seeding_torrents = monitor.poll(to_downloader)
+            controller.record(time.perf_counter() - started, ok=can_seeding_torrents is not None)
+            if can_seeding_torrents is None:
+                logger.info(f"下载器 {to_service.name} 查询校验任务失败，将在下次继续查询 ...")
+            else:
+                dropped = monitor.pop_dropped()
+                scheduler = self._recheck_schedulers.get(to_service.name)
+                if scheduler:
+                    # 校验结束的种子释放挂载点额度，继续校验排队的种子
+                    checked = monitor.idle(scheduler.settled)
+                    scheduler.finish(checked)
+                    self.__dispatch_recheck(to_service)
+                    # 校验结束仍不能做种，数据不完整，不再等待
+                    incomplete = monitor.pending & set(checked)
+                    if incomplete and self._autostart:
+                        logger.warn(f"{len(incomplete)} 个任务校验后数据不完整，不自动开始，请手动检查")
+                        monitor.discard(incomplete)
+                        dropped |= incomplete
+                if dropped and self._journal:
+                    self._journal.record(TransferJournal.DROPPED, dropped)
+                # 未开启自动开始时，不在校验队列中的种子无需继续检查
+                if not self._autostart:
+                    monitor.discard(monitor.pending - (scheduler.hashes if scheduler else set()))
+            if can_seeding_torrents and self._autostart:
                 logger.info(f"共 {len(can_seeding_torrents)} 个任务校验完成，开始做种")
                 # 开始做种
                 to_downloader.start_torrents(ids=can_seeding_torrents)
-                # 去除已经处理过的种子
-                self._recheck_torrents[to_service.name] = list(
-                    set(recheck_torrents).difference(set(can_seeding_torrents)))
-            else:
-                logger.info(f"没有新的任务校验完成，将在下次个周期继续检查 ...")
-
-        elif torrents is None:
-            logger.info(f"下载器 {to_service.name} 查询校验任务失败，将在下次继续查询 ...")
+                if self._journal:
+                    self._journal.record(TransferJournal.STARTED, can_seeding_torrents)
+            if self._journal:
+                self._journal.sync()
+        finally:
+            self._is_recheck_running = False
+
+        if monitor.pending:
+            # 下载器响应变慢时按比例延长检查间隔
+            self.__schedule_recheck(monitor.next_interval(self.__get_recheck_interval()) * controller.scale())
         else:
-            logger.info(f"下载器 {to_service.name} 中没有需要检查的校验任务，清空待处理列表")
-            self._recheck_torrents[to_service.name] = []
-
-        self._is_recheck_running = False
+            logger.info(f"下载器 {to_service.name} 的校验任务已全部处理")
+            if self._journal:
+                self._journal.compact(self.__journal_required(to_service))
 
     @staticmethod
     def __get_hash(torrent: Any, dl_type: str):
@@ -965,27 +1737,28 @@ class TorrentTransferRay(_PluginBase):
             return ""
 
     @staticmethod
-    def __get_save_path(torrent: Any, dl_type: str):
+    def __get_completion_time(torrent: Any, dl_type: str) -> int:
         """
-        获取种子保存路径
+        获取种子完成时间
         """
         try:
-            return torrent.get("save_path") if dl_type == "qbittorrent" else torrent.download_dir
+            if dl_type == "qbittorrent":
+                return int(torrent.get("completion_on") or 0)
+            return int(torrent.done_date.timestamp()) if torrent.done_date else 0
         except Exception as e:
             print(str(e))
-            return ""
+            return 0
 
     @staticmethod
-    def __can_seeding(torrent: Any, dl_type: str):
+    def __get_save_path(torrent: Any, dl_type: str):
         """
-        判断种子是否可以做种并处于暂停状态
+        获取种子保存路径
         """
         try:
-            return (torrent.get("state") in ["pausedUP", "stoppedUP"]) if dl_type == "qbittorrent" \
-                else (torrent.status.stopped and torrent.percent_done == 1)
+            return torrent.get("save_path") if dl_type == "qbittorrent" else torrent.download_dir
         except Exception as e:
             print(str(e))
-            return False
+            return ""
 
     @staticmethod
     def __convert_save_path(save_path: str, from_root: str, to_root: str):
@@ -0,0 +1,76 @@
+import json
+import os
+import sqlite3
+from pathlib import Path
+from threading import Lock
+from typing import List, Optional, Tuple, Union
+
+from bencode import bdecode
+
+from app.log import logger
+
+
+class FastresumeIndex:
+    """
+    qBittorrent fastresume索引：hash -> (trackers, 保存路径, 修改时间)
+    持久化到SQLite，文件修改时间变化时才重新解析
+    """
+
+    def __init__(self, db_path: Union[Path, str]):
+        self._lock = Lock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS fastresume ("
+                           "hash TEXT PRIMARY KEY, "
+                           "mtime INTEGER NOT NULL, "
+                           "trackers TEXT NOT NULL, "
+                           "save_path TEXT NOT NULL)")
+        # 解析次数与命中次数
+        self.parsed = 0
+        self.hits = 0
+
+    def lookup(self, torrent_hash: str, fastresume_file: Path,
+               mtime: Optional[int] = None) -> Optional[Tuple[List[List[str]], str]]:
+        """
+        查询fastresume中的trackers和保存路径，索引中没有或已过期时解析文件并更新索引
+        :param torrent_hash: 种子hash
+        :param fastresume_file: fastresume文件路径
+        :param mtime: 文件修改时间（纳秒），为空时读取文件状态
+        :return: (trackers, 保存路径)，文件不存在或解析失败时返回None
+        """
+        if mtime is None:
+            try:
+                mtime = os.stat(fastresume_file).st_mtime_ns
+            except OSError:
+                return None
+        with self._lock:
+            row = self._conn.execute("SELECT mtime, trackers, save_path FROM fastresume WHERE hash = ?",
+                                     (torrent_hash,)).fetchone()
+        if row and row[0] == mtime:
+            self.hits += 1
+            return json.loads(row[1]), row[2]
+
+        try:
+            fastresume = bdecode(Path(fastresume_file).read_bytes())
+        except Exception as err:
+            logger.error(f"解析fastresume文件 {fastresume_file} 出错：{str(err)}")
+            return None
+        self.parsed += 1
+        trackers = fastresume.get('trackers')
+        # 只保留可以序列化的tracker地址
+        trackers = [[tracker for tracker in tier if isinstance(tracker, str)]
+                    for tier in trackers if isinstance(tier, list)] if isinstance(trackers, list) else []
+        save_path = fastresume.get('qBt-savePath') or fastresume.get('save_path') or ""
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO fastresume VALUES (?, ?, ?, ?)",
+                               (torrent_hash, mtime, json.dumps(trackers), str(save_path)))
+        return trackers, str(save_path)
+
+    def close(self):
+        """
+        提交并关闭索引
+        """
+        with self._lock:
+            try:
+                self._conn.commit()
+            finally:
+                self._conn.close()
@@ -0,0 +1,180 @@
+import json
+import os
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Set, Union
+
+from app.log import logger
+
+
+class TransferJournal:
+    """
+    转移日志：追加记录每个种子的转移进度，重启后重放以继续未完成的转移
+    每行一条JSON记录，写入后立即flush，批量操作提交后fsync；重放时忽略写了一半的末行
+    """
+
+    # 种子状态：已计划转移、已添加到目的下载器、已开始校验、已开始做种、已删除源种子
+    PLANNED = "planned"
+    ADDED = "added"
+    RECHECKING = "rechecking"
+    STARTED = "started"
+    DELETED = "deleted"
+    # 终止状态：已不在目的下载器中或校验后数据不完整，不再继续后续操作
+    DROPPED = "dropped"
+
+    def __init__(self, path: Union[Path, str]):
+        self._path = Path(path)
+        self._lock = Lock()
+        # hash -> 已记录的状态
+        self._torrents: Dict[str, Set[str]] = {}
+        # 最近一次转移：{"from": 源下载器, "to": 目的下载器, "finished": 是否完成}
+        self.run: Optional[dict] = None
+        self.__replay()
+        self._file = open(self._path, "a", encoding="utf-8")
+
+    @property
+    def unfinished(self) -> bool:
+        """
+        是否有中断的转移
+        """
+        return bool(self.run) and not self.run.get("finished")
+
+    def states(self, torrent_hash: str) -> Set[str]:
+        return self._torrents.get(torrent_hash) or set()
+
+    def pending(self, state: str) -> List[str]:
+        """
+        已添加到目的下载器但还没有达到指定状态的种子，已终止的种子除外
+        """
+        with self._lock:
+            return [torrent_hash for torrent_hash, states in self._torrents.items()
+                    if self.ADDED in states and state not in states and self.DROPPED not in states]
+
+    def begin(self, from_name: str, to_name: str):
+        """
+        开始转移，下载器变化时丢弃之前的记录
+        """
+        with self._lock:
+            if self.run and (self.run.get("from"), self.run.get("to")) != (from_name, to_name):
+                logger.warn(f"转移的下载器已变化，丢弃 {self.run.get('from')} -> {self.run.get('to')} 的未完成记录")
+                self._torrents.clear()
+                self.__rewrite()
+            self.run = {"from": from_name, "to": to_name, "finished": False}
+            self.__write({"run": "begin", "from": from_name, "to": to_name})
+
+    def record(self, state: str, hashes: Iterable[str]):
+        """
+        记录种子达到的状态
+        """
+        hashes = list(hashes)
+        if not hashes:
+            return
+        with self._lock:
+            for torrent_hash in hashes:
+                self._torrents.setdefault(torrent_hash, set()).add(state)
+            self.__write({"state": state, "hashes": hashes})
+
+    def sync(self):
+        """
+        将已写入的记录落盘
+        """
+        with self._lock:
+            try:
+                os.fsync(self._file.fileno())
+            except OSError as e:
+                logger.debug(f"转移日志落盘失败：{str(e)}")
+
+    def finish(self, required: Set[str]):
+        """
+        转移完成，压缩日志
+        """
+        with self._lock:
+            if self.run:
+                self.run["finished"] = True
+            self.__write({"run": "end"})
+        self.compact(required)
+
+    def compact(self, required: Set[str]):
+        """
+        移除已完成全部后续操作或已终止的种子，转移已完成时一并移除未添加成功的种子
+        :param required: 种子完成转移需要达到的状态
+        """
+        with self._lock:
+            finished = not self.unfinished
+            for torrent_hash, states in list(self._torrents.items()):
+                if self.DROPPED in states:
+                    self._torrents.pop(torrent_hash)
+                elif self.ADDED in states:
+                    if required <= states:
+                        self._torrents.pop(torrent_hash)
+                elif finished:
+                    self._torrents.pop(torrent_hash)
+            self.__rewrite()
+
+    def close(self):
+        with self._lock:
+            try:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except OSError:
+                pass
+            finally:
+                self._file.close()
+
+    def __write(self, record: dict):
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._file.flush()
+
+    def __rewrite(self):
+        """
+        按当前状态重写日志，先写临时文件再替换，避免中途崩溃丢失记录
+        """
+        lines = []
+        if self.run:
+            lines.append({"run": "begin", "from": self.run.get("from"), "to": self.run.get("to")})
+            if self.run.get("finished"):
+                lines.append({"run": "end"})
+        by_state: Dict[str, List[str]] = {}
+        for torrent_hash, states in self._torrents.items():
+            for state in states:
+                by_state.setdefault(state, []).append(torrent_hash)
+        lines.extend({"state": state, "hashes": hashes} for state, hashes in by_state.items())
+
+        temp_path = self._path.with_suffix(".tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            for line in lines:
+                f.write(json.dumps(line, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        if getattr(self, "_file", None):
+            self._file.close()
+        os.replace(temp_path, self._path)
+        self._file = open(self._path, "a", encoding="utf-8")
+
+    def __replay(self):
+        """
+        重放日志，恢复各种子的状态
+        """
+        if not self._path.exists():
+            return
+        count = 0
+        with open(self._path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # 崩溃时写了一半的记录
+                    logger.warn(f"忽略转移日志中不完整的记录：{line.strip()[:100]}")
+                    continue
+                count += 1
+                if record.get("run") == "begin":
+                    self.run = {"from": record.get("from"), "to": record.get("to"), "finished": False}
+                elif record.get("run") == "end":
+                    if self.run:
+                        self.run["finished"] = True
+                elif record.get("state"):
+                    for torrent_hash in record.get("hashes") or []:
+                        self._torrents.setdefault(torrent_hash, set()).add(record["state"])
+        if count:
+            logger.info(f"重放转移日志 {count} 条记录，涉及 {len(self._torrents)} 个种子"
+                        f"{'，上次转移未完成' if self.unfinished else ''}")
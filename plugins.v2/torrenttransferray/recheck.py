@@ -0,0 +1,351 @@
+import heapq
+import os
+import time
+from functools import lru_cache
+from itertools import count
+from threading import Lock
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.log import logger
+
+
+class RecheckMonitor:
+    """
+    校验任务监控：增量获取待校验种子的状态，按剩余校验量决定下次检查时间
+    QB使用sync/maindata的rid增量接口，TR使用recently-active，新加入的种子单独查询一次，
+    均不可用时逐个查询待校验种子
+    """
+
+    # 检查间隔（秒）
+    MIN_INTERVAL = 2
+    MAX_INTERVAL = 60
+    # 估算的校验速度（字节/秒），用于计算下次检查时间
+    RECHECK_RATE = 100 * 1024 * 1024
+    # TR需要的种子字段
+    TR_FIELDS = ["id", "hashString", "status", "percentDone", "totalSize", "recheckProgress"]
+    # TR的recently-active只返回60秒内有变化的种子，两次检查间隔超过该值（秒）时重新全量查询
+    TR_ACTIVE_WINDOW = 50
+
+    def __init__(self, dl_type: str):
+        self._type = dl_type
+        # add可能在转移线程中调用，与检查线程同时进行，查询下载器期间不持有锁
+        self._lock = Lock()
+        # 待校验种子：hash -> [是否可做种, 大小, 校验进度, 是否校验中]
+        self._pending: Dict[str, list] = {}
+        # QB增量同步的rid，0表示下次全量同步
+        self._rid = 0
+        # TR是否需要全量查询待校验种子
+        self._synced = False
+        # TR上次查询的时间
+        self._polled_at = 0.0
+        # 新加入、还没有查询过状态的种子
+        self._new: Set[str] = set()
+        # 连续没有种子校验完成的次数
+        self._idle = 0
+        # 已不在下载器中、停止检查的种子
+        self._dropped: Set[str] = set()
+
+    @property
+    def pending(self) -> Set[str]:
+        with self._lock:
+            return set(self._pending)
+
+    def add(self, hashes: List[str]):
+        """
+        添加待校验种子，下次检查时单独查询这些种子的状态，其余种子继续增量同步
+        """
+        with self._lock:
+            for torrent_hash in hashes:
+                if torrent_hash not in self._pending:
+                    self._pending[torrent_hash] = [False, 0, 0, False]
+                    self._new.add(torrent_hash)
+            self._idle = 0
+
+    def pop_dropped(self) -> Set[str]:
+        """
+        取出上次取出后因已不在下载器中而停止检查的种子
+        """
+        with self._lock:
+            dropped, self._dropped = self._dropped, set()
+        return dropped
+
+    def discard(self, hashes: Iterable[str]):
+        """
+        不再检查指定的种子
+        """
+        with self._lock:
+            for torrent_hash in hashes:
+                self._pending.pop(torrent_hash, None)
+                self._new.discard(torrent_hash)
+
+    def poll(self, downloader: Any) -> Optional[List[str]]:
+        """
+        获取待校验种子的最新状态，移除已校验完成或已删除的种子
+        :return: 校验完成可以做种的种子hash，查询失败时返回None
+        """
+        with self._lock:
+            # 查询期间新加入的种子留到下次查询
+            new = set(self._new)
+        try:
+            if self._type == "qbittorrent" and getattr(downloader, "qbc", None):
+                ok = self.__sync_qbittorrent(downloader, new)
+            elif self._type == "transmission" and getattr(downloader, "trc", None):
+                ok = self.__sync_transmission(downloader.trc, new)
+            else:
+                ok = self.__query_torrents(downloader, list(self.pending))
+        except Exception as e:
+            logger.debug(f"增量获取校验状态失败，改为逐个查询：{str(e)}")
+            self._rid = 0
+            self._synced = False
+            ok = self.__query_torrents(downloader, list(self.pending))
+        if not ok:
+            return None
+
+        with self._lock:
+            self._new -= new
+            finished = [torrent_hash for torrent_hash, status in self._pending.items() if status[0]]
+            for torrent_hash in finished:
+                self._pending.pop(torrent_hash)
+            self._idle = 0 if finished else self._idle + 1
+        return finished
+
+    def idle(self, hashes: Iterable[str]) -> List[str]:
+        """
+        不在校验中的种子：已校验完成、校验后数据不完整或已不在下载器中
+        """
+        with self._lock:
+            return [torrent_hash for torrent_hash in hashes
+                    if torrent_hash not in self._pending or not self._pending[torrent_hash][3]]
+
+    def next_interval(self, min_interval: float = MIN_INTERVAL) -> float:
+        """
+        下次检查的间隔（秒）：按最快完成的种子的剩余校验量估算，连续没有进展时指数退避
+        :param min_interval: 最短间隔
+        """
+        min_interval = min(max(min_interval, self.MIN_INTERVAL), self.MAX_INTERVAL)
+        with self._lock:
+            remaining = [size * (1 - progress) for _, size, progress, _ in self._pending.values() if size]
+            backoff = min_interval * (2 ** min(self._idle, 8))
+        interval = min(remaining) / self.RECHECK_RATE if remaining else 0
+        return min(max(interval, backoff, min_interval), self.MAX_INTERVAL)
+
+    def __sync_qbittorrent(self, downloader: Any, new: Set[str]) -> bool:
+        data = downloader.qbc.sync_maindata(rid=self._rid)
+        torrents: Dict[str, dict] = data.get("torrents") or {}
+        self._rid = data.get("rid") or 0
+        with self._lock:
+            if data.get("full_update"):
+                removed = set(self._pending) - set(torrents)
+            else:
+                removed = set(data.get("torrents_removed") or [])
+            for torrent_hash in removed & set(self._pending):
+                logger.info(f"种子 {torrent_hash} 已不在下载器中，停止检查")
+                self._pending.pop(torrent_hash)
+                self._dropped.add(torrent_hash)
+            for torrent_hash, status in self._pending.items():
+                # 增量数据只包含变化的字段
+                info = torrents.get(torrent_hash)
+                if info:
+                    self.__update_qbittorrent(status, info)
+            # 新加入的种子在增量数据中可能没有变化，单独查询一次
+            new = [torrent_hash for torrent_hash in new
+                   if torrent_hash in self._pending and torrent_hash not in torrents]
+        return self.__query_torrents(downloader, new) if new else True
+
+    def __sync_transmission(self, trc: Any, new: Set[str]) -> bool:
+        now = time.time()
+        # 首次查询或距上次查询太久，recently-active可能遗漏变化，全量查询
+        full = not self._synced or now - self._polled_at > self.TR_ACTIVE_WINDOW
+        with self._lock:
+            ids = list(self._pending) if full else [torrent_hash for torrent_hash in new
+                                                     if torrent_hash in self._pending]
+        torrents = []
+        if ids:
+            torrents = trc.get_torrents(ids=ids, arguments=self.TR_FIELDS)
+            found = {torrent.hashString for torrent in torrents}
+            with self._lock:
+                for torrent_hash in set(ids) - found:
+                    if self._pending.pop(torrent_hash, None) is not None:
+                        logger.info(f"种子 {torrent_hash} 已不在下载器中，停止检查")
+                        self._dropped.add(torrent_hash)
+        if not full:
+            active, _ = trc.get_recently_active_torrents(arguments=self.TR_FIELDS)
+            torrents = list(torrents) + list(active)
+        self._synced = True
+        self._polled_at = now
+        with self._lock:
+            for torrent in torrents:
+                status = self._pending.get(torrent.hashString)
+                if status is not None:
+                    self.__update_transmission(status, torrent)
+        return True
+
+    def __query_torrents(self, downloader: Any, ids: List[str]) -> bool:
+        if not ids:
+            return True
+        torrents, error = downloader.get_torrents(ids=ids)
+        if torrents is None or error:
+            return False
+        found = set()
+        with self._lock:
+            for torrent in torrents:
+                if self._type == "qbittorrent":
+                    torrent_hash = torrent.get("hash")
+                    status = self._pending.get(torrent_hash)
+                    if status is not None:
+                        self.__update_qbittorrent(status, torrent)
+                else:
+                    torrent_hash = torrent.hashString
+                    status = self._pending.get(torrent_hash)
+                    if status is not None:
+                        self.__update_transmission(status, torrent)
+                found.add(torrent_hash)
+            missing = {torrent_hash for torrent_hash in set(ids) - found if torrent_hash in self._pending}
+            if missing:
+                logger.info(f"{len(missing)} 个种子已不在下载器中，停止检查")
+                for torrent_hash in missing:
+                    self._pending.pop(torrent_hash)
+                self._dropped |= missing
+        return True
+
+    def __update_qbittorrent(self, status: list, info: dict):
+        if "state" in info:
+            status[0] = info["state"] in ["pausedUP", "stoppedUP"]
+            status[3] = self.__qb_checking(info["state"])
+        if "size" in info:
+            status[1] = info["size"] or 0
+        if "progress" in info:
+            status[2] = info["progress"] or 0
+
+    @staticmethod
+    def __qb_checking(state: Optional[str]) -> bool:
+        return bool(state) and (state.startswith("checking") or state == "queuedForChecking")
+
+    @staticmethod
+    def __update_transmission(status: list, torrent: Any):
+        try:
+            status[0] = torrent.status.stopped and torrent.percent_done == 1
+            status[1] = torrent.total_size or 0
+            status[2] = (torrent.recheck_progress or 0) if torrent.status.checking else 0
+            status[3] = bool(torrent.status.checking or torrent.status.check_pending)
+        except Exception as e:
+            print(str(e))
+
+
+@lru_cache(maxsize=1024)
+def mount_point(path: Optional[str]) -> str:
+    """
+    获取保存路径所在的挂载点，路径在本机不存在或只能找到根目录时取第一级目录，宁可多个磁盘共用额度
+    """
+    if not path:
+        return ""
+    path = os.path.normpath(path).replace("\\", "/")
+    current = path
+    while not os.path.exists(current):
+        parent = os.path.dirname(current)
+        if parent == current:
+            break
+        current = parent
+    if os.path.exists(current):
+        while not os.path.ismount(current):
+            parent = os.path.dirname(current)
+            if parent == current:
+                break
+            current = parent
+        if os.path.dirname(current) != current:
+            return current
+    return "/" + "/".join([part for part in path.split("/") if part][:1])
+
+
+class RecheckScheduler:
+    """
+    磁盘感知的校验调度：按目的挂载点限制同时校验的数据量，避免大量校验同时争抢同一组磁盘
+    同一挂载点内小种子优先，不同挂载点互不影响，单位时间内完成的种子数更多
+    """
+
+    # 开始校验后下载器状态更新的等待时间（秒），之前不判断是否校验结束
+    GRACE = 5
+
+    def __init__(self, quota: int = 0):
+        """
+        :param quota: 每个挂载点同时校验的字节数上限，0表示不限制
+        """
+        self._lock = Lock()
+        self.quota = quota
+        # 挂载点 -> 等待校验的堆 [(大小, 序号, hash)]
+        self._queues: Dict[str, List[Tuple[int, int, str]]] = {}
+        # 挂载点 -> 正在校验的种子 {hash: (大小, 开始时间)}
+        self._running: Dict[str, Dict[str, Tuple[int, float]]] = {}
+        # 等待校验的种子
+        self._queued: Set[str] = set()
+        self._seq = count()
+
+    @property
+    def waiting(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    @property
+    def hashes(self) -> Set[str]:
+        """
+        排队或正在校验的种子
+        """
+        with self._lock:
+            return self._queued | {torrent_hash for running in self._running.values() for torrent_hash in running}
+
+    @property
+    def settled(self) -> Set[str]:
+        """
+        开始校验超过等待时间、可以判断是否校验结束的种子
+        """
+        deadline = time.time() - self.GRACE
+        with self._lock:
+            return {torrent_hash for running in self._running.values()
+                    for torrent_hash, (_, started) in running.items() if started <= deadline}
+
+    def add(self, torrent_hash: str, size: Optional[int] = None, save_path: Optional[str] = None):
+        """
+        加入等待校验的种子，已在排队或正在校验的种子忽略
+        :param size: 种子总大小，未知时按一个挂载点的上限计算，单独校验
+        :param save_path: 目的下载器中的保存路径
+        """
+        size = size if size else self.quota
+        mount = mount_point(save_path)
+        with self._lock:
+            if torrent_hash in self._queued or any(torrent_hash in hashes for hashes in self._running.values()):
+                return
+            heapq.heappush(self._queues.setdefault(mount, []), (size, next(self._seq), torrent_hash))
+            self._queued.add(torrent_hash)
+
+    def take(self) -> List[str]:
+        """
+        取出现在可以开始校验的种子：各挂载点在上限内按从小到大取出，空闲的挂载点至少取一个
+        """
+        hashes = []
+        now = time.time()
+        with self._lock:
+            for mount, queue in self._queues.items():
+                running = self._running.setdefault(mount, {})
+                used = sum(size for size, _ in running.values())
+                while queue:
+                    size, _, torrent_hash = queue[0]
+                    if self.quota and running and used + size > self.quota:
+                        break
+                    heapq.heappop(queue)
+                    self._queued.discard(torrent_hash)
+                    running[torrent_hash] = (size, now)
+                    used += size
+                    hashes.append(torrent_hash)
+            self._queues = {mount: queue for mount, queue in self._queues.items() if queue}
+        return hashes
+
+    def finish(self, hashes: Iterable[str]):
+        """
+        校验结束或种子已删除，释放所在挂载点的额度
+        """
+        hashes = set(hashes)
+        if not hashes:
+            return
+        with self._lock:
+            for running in self._running.values():
+                for torrent_hash in hashes & running.keys():
+                    running.pop(torrent_hash)
@@ -0,0 +1,645 @@
+import hashlib
+import os
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from queue import Queue
+from threading import Condition, Event, Lock, Thread
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from bencode import bencode
+
+from app.log import logger
+
+
+class TransferCounter:
+    """
+    线程安全的转移计数器
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        # 总数
+        self.total = 0
+        # 总成功数
+        self.success = 0
+        # 总失败数
+        self.fail = 0
+        # 跳过数
+        self.skip = 0
+        # 删除重复数
+        self.del_dup = 0
+
+    def incr(self, name: str, step: int = 1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + step)
+
+
+class TransferMetrics:
+    """
+    线程安全的转移耗时统计：各阶段耗时与次数、读取字节数、各下载器的请求延迟
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self.start = time.time()
+        self._started = time.perf_counter()
+        # 阶段 -> [耗时, 次数]
+        self.phases: Dict[str, list] = {}
+        # 下载器 -> 请求耗时列表
+        self.rpc: Dict[str, List[float]] = {}
+        # 读取的文件字节数
+        self.bytes_read = 0
+
+    def add(self, phase: str, elapsed: float, count: int = 1, rpc: Optional[str] = None):
+        with self._lock:
+            stat = self.phases.get(phase)
+            if stat is None:
+                stat = self.phases[phase] = [0.0, 0]
+            stat[0] += elapsed
+            stat[1] += count
+            if rpc:
+                self.rpc.setdefault(rpc, []).append(elapsed)
+
+    @contextmanager
+    def phase(self, phase: str, rpc: Optional[str] = None):
+        """
+        统计代码块的耗时，rpc为下载器名称时同时记录请求延迟
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(phase, time.perf_counter() - started, rpc=rpc)
+
+    def add_bytes(self, size: int):
+        with self._lock:
+            self.bytes_read += size
+
+    def to_dict(self, counter: Optional["TransferCounter"] = None) -> Dict[str, Any]:
+        with self._lock:
+            rpc = {}
+            for name, latencies in self.rpc.items():
+                ordered = sorted(latencies)
+                rpc[name] = {
+                    "count": len(ordered),
+                    "p50": round(ordered[len(ordered) // 2], 4),
+                    "p95": round(ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)], 4),
+                    "max": round(ordered[-1], 4)
+                }
+            return {
+                "start": self.start,
+                "duration": round(time.perf_counter() - self._started, 3),
+                "phases": {name: [round(elapsed, 4), count] for name, (elapsed, count) in self.phases.items()},
+                "rpc": rpc,
+                "bytes_read": self.bytes_read,
+                "counter": {name: getattr(counter, name)
+                            for name in ("total", "success", "fail", "skip", "del_dup")} if counter else {}
+            }
+
+
+class AimdController:
+    """
+    AIMD并发控制：请求正常时每轮增加1个并发，出错或延迟明显高于基线时减半
+    用于限制同时进行的下载器请求数，也可用limit_max / limit作为轮询间隔的倍数
+    """
+
+    # 延迟超过基线的倍数视为过载
+    TOLERANCE = 3.0
+    # 低于该延迟（秒）时不视为过载，避免本地下载器的抖动
+    MIN_LATENCY = 0.2
+    # 正常请求后基线延迟允许上升的比例，下载器本身变慢时基线可以缓慢跟上
+    DRIFT = 0.001
+
+    def __init__(self, limit_max: int, limit_min: int = 1, initial: Optional[int] = None):
+        self._cond = Condition()
+        self.limit_max = max(int(limit_max), 1)
+        self.limit_min = min(max(int(limit_min), 1), self.limit_max)
+        self.limit = float(min(max(initial or self.limit_max, self.limit_min), self.limit_max))
+        self.inflight = 0
+        # 基线延迟：正常请求的最低延迟
+        self._baseline: Optional[float] = None
+        # 上次减半后完成的请求数，每轮最多减半一次
+        self._since_decrease = 0
+        # 请求数、失败数、过慢数、减半次数
+        self.requests = 0
+        self.errors = 0
+        self.slow = 0
+        self.decreases = 0
+
+    def acquire(self):
+        """
+        等待空闲的并发额度
+        """
+        with self._cond:
+            while self.inflight >= int(self.limit):
+                self._cond.wait()
+            self.inflight += 1
+
+    def release(self, elapsed: float, ok: bool = True):
+        """
+        归还并发额度并记录本次请求的结果
+        """
+        with self._cond:
+            self.inflight -= 1
+        self.record(elapsed, ok)
+
+    def record(self, elapsed: float, ok: bool = True):
+        """
+        记录请求的耗时与结果，调整并发上限
+        """
+        with self._cond:
+            self.requests += 1
+            self._since_decrease += 1
+            slow = ok and self._baseline is not None \
+                and elapsed > max(self._baseline * self.TOLERANCE, self.MIN_LATENCY)
+            if not ok or slow:
+                if not ok:
+                    self.errors += 1
+                else:
+                    self.slow += 1
+                if self._since_decrease >= self.limit:
+                    self.limit = max(self.limit / 2, float(self.limit_min))
+                    self._since_decrease = 0
+                    self.decreases += 1
+            else:
+                self._baseline = elapsed if self._baseline is None \
+                    else min(elapsed, self._baseline * (1 + self.DRIFT))
+                self.limit = min(self.limit + 1 / self.limit, float(self.limit_max))
+            self._cond.notify_all()
+
+    def scale(self) -> float:
+        """
+        并发上限缩小的倍数，用于放大轮询间隔
+        """
+        return self.limit_max / self.limit
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "limit": round(self.limit, 2),
+                "baseline": round(self._baseline or 0, 4),
+                "requests": self.requests,
+                "errors": self.errors,
+                "slow": self.slow,
+                "decreases": self.decreases
+            }
+
+
+class TransferItem:
+    """
+    待转移种子，仅保留转移所需的字段
+    """
+    __slots__ = ("hash", "save_path", "completion", "signature")
+
+    def __init__(self, hash_str: str, save_path: Optional[str], completion: int = 0, signature: int = 0):
+        self.hash = hash_str
+        self.save_path = save_path
+        # 完成时间
+        self.completion = completion
+        # 保存路径、标签、分类的特征值
+        self.signature = signature
+
+
+class BackupEntry:
+    """
+    BT_backup目录中一个种子的文件状态，文件不存在时对应的修改时间为None
+    """
+    __slots__ = ("directory", "torrent_size", "torrent_mtime", "fastresume_mtime")
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.torrent_size = 0
+        # 修改时间（纳秒）
+        self.torrent_mtime: Optional[int] = None
+        self.fastresume_mtime: Optional[int] = None
+
+    @property
+    def has_torrent(self) -> bool:
+        return self.torrent_mtime is not None
+
+    @property
+    def has_fastresume(self) -> bool:
+        return self.fastresume_mtime is not None
+
+
+def scan_backup_dirs(paths: Iterable[str], hashes: Optional[Set[str]] = None,
+                     workers: int = 4) -> Dict[str, BackupEntry]:
+    """
+    一次性扫描种子目录，返回 hash -> BackupEntry
+    多个目录并行列出，文件状态并行读取，减少网络存储上逐个stat的等待
+    :param paths: 种子目录列表
+    :param hashes: 只读取这些hash的文件状态，为空时读取全部
+    :param workers: 并发数
+    """
+
+    def _list_dir(path: str) -> List[Tuple[str, str, os.DirEntry]]:
+        files = []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    name = entry.name
+                    if name.endswith(".torrent"):
+                        files.append((name[:-8], "torrent", entry))
+                    elif name.endswith(".fastresume"):
+                        files.append((name[:-11], "fastresume", entry))
+        except OSError as e:
+            logger.error(f"扫描种子目录 {path} 失败：{str(e)}")
+        return files
+
+    def _stat(entry: os.DirEntry) -> Optional[os.stat_result]:
+        try:
+            return entry.stat()
+        except OSError:
+            return None
+
+    paths = list(paths)
+    workers = max(workers, 1)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="transfer-scan") as executor:
+        if len(paths) > 1:
+            listings = list(executor.map(_list_dir, paths))
+        else:
+            listings = [_list_dir(path) for path in paths]
+        files = [file for listing in listings for file in listing
+                 if hashes is None or file[0] in hashes]
+        stats = executor.map(_stat, [file[2] for file in files], chunksize=64)
+        result: Dict[str, BackupEntry] = {}
+        for (torrent_hash, kind, entry), stat in zip(files, stats):
+            if stat is None:
+                continue
+            backup = result.get(torrent_hash)
+            if backup is None:
+                backup = result[torrent_hash] = BackupEntry(os.path.dirname(entry.path))
+            if kind == "torrent":
+                backup.directory = os.path.dirname(entry.path)
+                backup.torrent_size = stat.st_size
+                backup.torrent_mtime = stat.st_mtime_ns
+            else:
+                backup.fastresume_mtime = stat.st_mtime_ns
+    return result
+
+
+class PathPrefixTrie:
+    """
+    按目录层级匹配的路径前缀树，匹配耗时只与路径深度有关
+    """
+
+    _END = None
+
+    def __init__(self, paths: Iterable[str]):
+        self._root: Dict[Optional[str], Any] = {}
+        for path in paths:
+            if not path or not path.strip():
+                continue
+            node = self._root
+            for part in self.split(path.strip()):
+                node = node.setdefault(part, {})
+            node[self._END] = path.strip()
+
+    def __bool__(self):
+        return bool(self._root)
+
+    @staticmethod
+    def split(path: str) -> List[str]:
+        """
+        规范化路径并拆分为目录层级，绝对路径保留根节点
+        """
+        parts = os.path.normpath(path).replace("\\", "/").split("/")
+        return parts[:1] + [part for part in parts[1:] if part]
+
+    def match(self, path: str) -> Optional[str]:
+        """
+        返回命中的前缀路径，未命中返回None
+        """
+        node = self._root
+        for part in self.split(path):
+            node = node.get(part)
+            if node is None:
+                return None
+            if self._END in node:
+                return node[self._END]
+        return None
+
+
+class TransferRules:
+    """
+    预编译的转移过滤规则，配置只在初始化时解析一次。
+    规则按顺序执行，返回第一个不满足的原因；可通过 add_predicate 追加自定义规则。
+    """
+
+    def __init__(self, nopaths: Optional[str] = None, includecategory: Optional[str] = None,
+                 nolabels: Optional[str] = None, includelabels: Optional[str] = None,
+                 transferemptylabel: bool = False):
+        # 不转移的目录
+        paths = sorted({path.strip() for path in (nopaths or "").split("\n") if path.strip()})
+        self.nopaths = PathPrefixTrie(paths)
+        # 转移的分类
+        self.categories = self.__split(includecategory)
+        # 不转移的标签
+        self.nolabels = self.__split(nolabels)
+        # 转移的标签
+        self.includelabels = self.__split(includelabels)
+        # 是否转移无标签种子
+        self.transferemptylabel = bool(transferemptylabel)
+        # 规则特征值，规则变化时增量索引失效
+        self.fingerprint = zlib.crc32(repr((paths,
+                                            sorted(self.categories),
+                                            sorted(self.nolabels),
+                                            sorted(self.includelabels),
+                                            self.transferemptylabel)).encode())
+        self._predicates: List[Callable[[Optional[str], frozenset, str], Optional[str]]] = [
+            self.__check_path,
+            self.__check_category,
+            self.__check_labels
+        ]
+
+    @staticmethod
+    def __split(value: Optional[str]) -> frozenset:
+        return frozenset(item.strip() for item in (value or "").split(",") if item.strip())
+
+    def add_predicate(self, predicate: Callable[[Optional[str], frozenset, str], Optional[str]]):
+        """
+        追加规则，规则接收 (保存路径, 标签集合, 分类)，不满足时返回原因
+        """
+        self._predicates.append(predicate)
+
+    def match(self, save_path: Optional[str], labels: Optional[Iterable[str]], category: Optional[str]) -> Optional[str]:
+        """
+        判断种子是否需要转移，需要转移返回None，否则返回跳过原因
+        """
+        labels = frozenset(label for label in labels or [] if label)
+        category = category or ""
+        for predicate in self._predicates:
+            reason = predicate(save_path, labels, category)
+            if reason:
+                return reason
+        return None
+
+    def __check_path(self, save_path: Optional[str], labels: frozenset, category: str) -> Optional[str]:
+        if self.nopaths and save_path and self.nopaths.match(save_path):
+            return f"保存路径 {save_path} 不需要转移"
+        return None
+
+    def __check_category(self, save_path: Optional[str], labels: frozenset, category: str) -> Optional[str]:
+        if self.categories and category not in self.categories:
+            return f"不含有转移分类 {','.join(sorted(self.categories))}"
+        return None
+
+    def __check_labels(self, save_path: Optional[str], labels: frozenset, category: str) -> Optional[str]:
+        if not labels:
+            return None if self.transferemptylabel else "没有标签"
+        hit = self.nolabels.intersection(labels)
+        if hit:
+            return f"含有不转移标签 {','.join(sorted(hit))}"
+        missing = self.includelabels.difference(labels)
+        if missing:
+            return f"不含有转移标签 {','.join(sorted(missing))}"
+        return None
+
+
+class StagePipeline:
+    """
+    多阶段并发流水线，各阶段之间通过有界队列传递数据。
+    阶段函数返回None时丢弃该数据，否则交给下一阶段处理。
+    阶段函数抛出异常时记录日志并丢弃该数据，可通过on_error统计失败。
+    """
+
+    _SENTINEL = object()
+
+    def __init__(self, stages: List[Tuple[str, Callable[[Any], Any], int]],
+                 queue_size: int = 16, event: Optional[Event] = None,
+                 on_error: Optional[Callable[[str, Any, Exception], None]] = None):
+        """
+        :param stages: 阶段列表 [(阶段名称, 处理函数, 线程数)]
+        :param queue_size: 每个阶段输入队列的长度上限
+        :param event: 退出事件，设置后不再处理新的数据
+        :param on_error: 阶段函数出错时的回调 (阶段名称, 数据, 异常)
+        """
+        self._stages = [(name, func, max(int(workers or 1), 1)) for name, func, workers in stages]
+        self._queue_size = max(int(queue_size or 1), 1)
+        self._event = event
+        self._on_error = on_error
+
+    def __stopped(self) -> bool:
+        return bool(self._event and self._event.is_set())
+
+    def run(self, items: Iterable[Any]):
+        """
+        投递数据并阻塞至所有阶段处理完成
+        """
+        if not self._stages:
+            return
+        queues = [Queue(maxsize=self._queue_size) for _ in self._stages]
+        threads = []
+        for index, (name, func, workers) in enumerate(self._stages):
+            if index + 1 < len(self._stages):
+                out_queue, out_workers = queues[index + 1], self._stages[index + 1][2]
+            else:
+                out_queue, out_workers = None, 0
+            # 本阶段剩余线程数，最后一个退出的线程负责通知下一阶段结束
+            remaining = [workers]
+            lock = Lock()
+            for i in range(workers):
+                thread = Thread(target=self.__worker,
+                                name=f"{name}-{i}",
+                                args=(name, func, queues[index], out_queue, out_workers, remaining, lock),
+                                daemon=True)
+                thread.start()
+                threads.append(thread)
+        try:
+            for item in items:
+                if self.__stopped():
+                    break
+                queues[0].put(item)
+        finally:
+            for _ in range(self._stages[0][2]):
+                queues[0].put(self._SENTINEL)
+            for thread in threads:
+                thread.join()
+
+    def __worker(self, name: str, func: Callable[[Any], Any], in_queue: Queue, out_queue: Optional[Queue],
+                 out_workers: int, remaining: List[int], lock: Lock):
+        while True:
+            item = in_queue.get()
+            if item is self._SENTINEL:
+                break
+            # 停止后仍需消费队列，避免上游阻塞
+            if self.__stopped():
+                continue
+            try:
+                result = func(item)
+            except Exception as err:
+                logger.error(f"流水线阶段 {name} 处理出错：{str(err)}")
+                if self._on_error:
+                    try:
+                        self._on_error(name, item, err)
+                    except Exception as e:
+                        logger.error(f"流水线阶段 {name} 错误处理出错：{str(e)}")
+                continue
+            if result is not None and out_queue is not None:
+                out_queue.put(result)
+        with lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last and out_queue is not None:
+            for _ in range(out_workers):
+                out_queue.put(self._SENTINEL)
+
+
+def bencode_skip(data: bytes, pos: int) -> int:
+    """
+    跳过位于pos的一个bencode值，返回其结束位置（不解码内容）
+    data可以是bytes或mmap，按整数索引访问，不产生切片副本
+    """
+    token = data[pos]
+    # i<整数>e
+    if token == 0x69:
+        return data.find(b"e", pos) + 1
+    # l...e 或 d...e
+    if token in (0x6c, 0x64):
+        pos += 1
+        while data[pos] != 0x65:
+            pos = bencode_skip(data, pos)
+        return pos + 1
+    # <长度>:<字符串>，跳过pieces等大字段时只读取长度
+    if 0x30 <= token <= 0x39:
+        colon = data.find(b":", pos)
+        if colon < 0:
+            raise ValueError(f"无效的bencode数据，位置：{pos}")
+        return colon + 1 + int(data[pos:colon])
+    raise ValueError(f"无效的bencode数据，位置：{pos}")
+
+
+def bencode_dict_items(data: bytes, pos: int = 0) -> Iterator[Tuple[bytes, int, int]]:
+    """
+    遍历位于pos的bencode字典，返回 (键, 值起始位置, 值结束位置)
+    """
+    if data[pos] != 0x64:
+        raise ValueError(f"无效的bencode字典，位置：{pos}")
+    pos += 1
+    while data[pos] != 0x65:
+        colon = data.find(b":", pos)
+        if colon < 0:
+            raise ValueError(f"无效的bencode字典，位置：{pos}")
+        key_end = colon + 1 + int(data[pos:colon])
+        key = bytes(data[colon + 1:key_end])
+        value_end = bencode_skip(data, key_end)
+        yield key, key_end, value_end
+        pos = value_end
+
+
+def scan_torrent(data: bytes) -> Dict[bytes, Tuple[int, int]]:
+    """
+    扫描种子的顶层字典，返回 {键: (值起始位置, 值结束位置)}，不解码info等字段
+    """
+    return {key: (start, end) for key, start, end in bencode_dict_items(data)}
+
+
+def bencode_string(data: bytes, span: Optional[Tuple[int, int]]) -> bytes:
+    """
+    读取scan_torrent返回的字符串值，不存在或不是字符串时返回空
+    """
+    if not span or not 0x30 <= data[span[0]] <= 0x39:
+        return b""
+    colon = data.find(b":", span[0])
+    return bytes(data[colon + 1:span[1]])
+
+
+def bencode_int(data: bytes, span: Optional[Tuple[int, int]]) -> int:
+    """
+    读取位于span的整数值，不存在或不是整数时返回0
+    """
+    if not span or data[span[0]] != 0x69:
+        return 0
+    return int(data[span[0] + 1:span[1] - 1])
+
+
+def get_torrent_size(content: bytes) -> int:
+    """
+    从info字典读取种子数据的总大小，只遍历文件长度字段，不解码pieces
+    单文件为length，多文件为files中length之和，纯v2种子统计file tree
+    :return: 总字节数，解析失败时返回0
+    """
+
+    def _file_tree_size(pos: int) -> int:
+        total = 0
+        for key, start, end in bencode_dict_items(content, pos):
+            if content[start] != 0x64:
+                continue
+            if key == b"":
+                total += sum(bencode_int(content, (s, e))
+                             for k, s, e in bencode_dict_items(content, start) if k == b"length")
+            else:
+                total += _file_tree_size(start)
+        return total
+
+    try:
+        info = scan_torrent(content).get(b"info")
+        if not info:
+            return 0
+        fields = {key: (start, end) for key, start, end in bencode_dict_items(content, info[0])}
+        if b"length" in fields:
+            return bencode_int(content, fields[b"length"])
+        if b"files" in fields and content[fields[b"files"][0]] == 0x6c:
+            total = 0
+            pos = fields[b"files"][0] + 1
+            while content[pos] != 0x65:
+                total += sum(bencode_int(content, (s, e))
+                             for k, s, e in bencode_dict_items(content, pos) if k == b"length")
+                pos = bencode_skip(content, pos)
+            return total
+        if b"file tree" in fields:
+            return _file_tree_size(fields[b"file tree"][0])
+    except (ValueError, IndexError, TypeError):
+        pass
+    return 0
+
+
+def bencode_splice(data: bytes, values: Dict[bytes, Any]) -> bytes:
+    """
+    在顶层字典中写入或替换键值，其余字段（包括info）的原始字节保持不变，infohash不变
+    :param data: 种子原始内容
+    :param values: 需要写入的 {键: 值}，值按bencode编码
+    """
+    pending = sorted(values.items())
+    parts = [b"d"]
+
+    def _emit(key: bytes, value: Any):
+        parts.append(b"%d:%s%s" % (len(key), key, bencode(value)))
+
+    pos = 1
+    for key, _, end in bencode_dict_items(data):
+        # bencode字典的键按字节序排列，新键插入到第一个比它大的键之前
+        while pending and pending[0][0] < key:
+            _emit(*pending.pop(0))
+        if pending and pending[0][0] == key:
+            _emit(*pending.pop(0))
+        else:
+            parts.append(data[pos:end])
+        pos = end
+    for key, value in pending:
+        _emit(key, value)
+    parts.append(data[pos:])
+    return b"".join(parts)
+
+
+def get_info_hash(content: bytes) -> Optional[str]:
+    """
+    根据种子原始内容计算infohash，与qBittorrent的种子ID一致：
+    v1及混合种子为info字典的SHA1，纯v2种子为SHA256截取前20字节
+    """
+    try:
+        for key, start, end in bencode_dict_items(content):
+            if key != b"info":
+                continue
+            info_keys = {info_key for info_key, _, _ in bencode_dict_items(content, start)}
+            info = memoryview(content)[start:end]
+            if b"pieces" in info_keys:
+                return hashlib.sha1(info).hexdigest()
+            if b"meta version" in info_keys:
+                return hashlib.sha256(info).hexdigest()[:40]
+            return None
+    except (ValueError, IndexError, TypeError):
+        return None
+    return None
@@ -1,9 +1,15 @@
+import hashlib
+import json
+import math
+import time
 from datetime import datetime, timedelta
 from threading import Event
 from typing import Any, Dict, List, Tuple
 
 import pytz
 import requests
+from requests.adapters import HTTPAdapter
+from app import schemas
 from app.core.config import settings
 from app.helper.sites import SitesHelper
 from app.log import logger
@@ -12,7 +18,23 @@ from app.utils.http import RequestUtils
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 
-from .utils import check_response_is_valid_json
+from .cache import SearchCache
+from .health import HealthTracker
+from .search import MEDIA_TYPES, JackettSearcher, build_query
+from .utils import IndexerConf, check_response_is_valid_json
+
+# 注册到 MoviePilot 的索引器字段，IndexerConf 的其余字段使用站点默认值，不注册
+_INDEXER_KEYS = (
+    "id",
+    "name",
+    "domain",
+    "public",
+    "proxy",
+    "result_num",
+    "timeout",
+    "search",
+    "torrents",
+)
 
 
 class Jackett(_PluginBase):
@@ -25,7 +47,7 @@ class Jackett(_PluginBase):
     # 主题色
     plugin_color = "#000000"
     # 插件版本
-    plugin_version = "0.0.14"
+    plugin_version = "0.0.15"
     # 插件作者
     plugin_author = "Ray"
     # 作者主页
@@ -48,6 +70,27 @@ class Jackett(_PluginBase):
     _cron = None
     _run_once = False
     _sites = None
+    # 请求超时时间（秒）
+    _timeout = 15
+    # 检索单个索引器的超时时间上限（秒），本插件检索与注册到 MoviePilot 的索引器共用
+    _search_timeout = 30
+    # 复用的 HTTP 会话，生命周期与插件一致
+    _session: requests.Session | None = None
+    # 索引器缓存有效期（小时）
+    _cache_ttl = 12
+    # 索引器缓存：{"host", "updated", "etag", "indexers": {id: {"hash", "conf", "caps"}}}
+    _catalogue: Dict[str, Any] = {}
+    # 已注册到 SitesHelper 的索引器：domain -> 配置摘要
+    _registered: Dict[str, str] = {}
+    # 同时检索的索引器数量
+    _search_workers = 8
+    # 使用 Jackett 聚合接口检索
+    _aggregate = False
+    # 检索结果缓存时间（分钟）
+    _search_cache_ttl = 10
+    _searcher: JackettSearcher | None = None
+    # 索引器健康状态，重新加载配置后保留
+    _health: HealthTracker | None = None
 
     def init_plugin(self, config: dict | None = None):
         if config:
@@ -61,9 +104,38 @@ class Jackett(_PluginBase):
             self._password = str(config.get("password"))
             self._cron = str(config.get("cron"))
             self._run_once = bool(config.get("run_once"))
+            try:
+                self._cache_ttl = float(config.get("cache_ttl") or 12)
+            except ValueError:
+                self._cache_ttl = 12
+            try:
+                self._search_workers = max(int(config.get("search_workers") or 8), 1)
+            except ValueError:
+                self._search_workers = 8
+            self._aggregate = bool(config.get("aggregate"))
+            try:
+                self._search_cache_ttl = float(config.get("search_cache_ttl", 10) or 0)
+            except ValueError:
+                self._search_cache_ttl = 10
+            # 配置变化后重新创建会话
+            self._close_session()
+            if self._health is None:
+                self._health = HealthTracker(max_timeout=self._search_timeout)
+            self._searcher = JackettSearcher(
+                host=self._host,
+                api_key=self._api_key,
+                session=self._get_session,
+                max_workers=self._search_workers,
+                timeout=self._search_timeout,
+                cache=SearchCache(ttl=self._search_cache_ttl * 60),
+                health=self._health,
+            )
 
         if self._enabled:
             logger.info("Jackett 插件初始化完成")
+            # 使用缓存的索引器立即注册，无需等待 Jackett 响应
+            if self._api_key and self._host:
+                self._sync_indexers(self._get_catalogue())
 
             if self._run_once:
                 self._scheduler = BackgroundScheduler(timezone=settings.TZ)
@@ -81,6 +153,7 @@ class Jackett(_PluginBase):
                         "date",
                         run_date=datetime.now(tz=pytz.timezone(settings.TZ))
                         + timedelta(seconds=3),
+                        kwargs={"force": True},
                     )
                     # 关闭一次性开关
                     self._run_once = False
@@ -100,107 +173,293 @@ class Jackett(_PluginBase):
                 "password": self._password,
                 "cron": self._cron,
                 "run_once": self._run_once,
+                "cache_ttl": self._cache_ttl,
+                "search_workers": self._search_workers,
+                "aggregate": self._aggregate,
+                "search_cache_ttl": self._search_cache_ttl,
             }
         )
 
-    def get_status(self):
+    def get_status(self, force: bool = False):
         """
         检查连通性
+        :param force: 忽略缓存有效期，强制从 Jackett 刷新
         :return: True、False
         """
         if not self._api_key or not self._host:
             return False
-        self._sites = self.get_indexers()
-        for site in self._sites:
-            logger.info((site["domain"], site))
-            self._sites_helper.add_indexer(site["domain"], site)
-        return True if isinstance(self._sites, list) and len(self._sites) > 0 else False
+        catalogue = self._get_catalogue()
+        if force or time.time() - catalogue["updated"] >= self._cache_ttl * 3600:
+            self._refresh_catalogue(catalogue)
+        if self._searcher:
+            # 探测熔断中的索引器
+            for indexer in self._health.open_indexers():
+                self._searcher.probe(indexer)
+            self._update_caps(catalogue)
+        self._sync_indexers(catalogue)
+        return bool(self._sites)
 
-    def get_indexers(self):
+    def _get_catalogue(self) -> Dict[str, Any]:
         """
-        获取配置的jackett indexer
-        :return: indexer 信息 [(indexerId, indexerName, url)]
+        获取当前 Jackett 地址的索引器缓存，内存中没有时从插件数据中恢复
+        """
+        if self._catalogue.get("host") != self._host:
+            cached = self.get_data(f"catalogue-{self._host}") or {}
+            self._catalogue = {
+                "host": self._host,
+                "updated": cached.get("updated") or 0,
+                "etag": cached.get("etag"),
+                "indexers": cached.get("indexers") or {},
+            }
+        return self._catalogue
+
+    def _refresh_catalogue(self, catalogue: Dict[str, Any]):
+        """
+        从 Jackett 刷新索引器缓存，请求失败时保留原有缓存
         """
-        # 获取Cookie
-        headers = {
+        indexers, etag = self.get_indexers(etag=catalogue["etag"])
+        if indexers is None:
+            if etag:
+                logger.info("Jackett 索引器未变化")
+                catalogue["updated"] = time.time()
+                self.save_data(f"catalogue-{self._host}", catalogue)
+            return
+        entries = {}
+        for indexer in indexers:
+            digest = hashlib.sha1(
+                json.dumps(indexer, sort_keys=True).encode()
+            ).hexdigest()
+            entry = catalogue["indexers"].get(indexer["id"]) or {}
+            entries[indexer["id"]] = {
+                "hash": digest,
+                "conf": indexer,
+                # 配置未变化时沿用已获取的 caps
+                "caps": entry.get("caps") if entry.get("hash") == digest else None,
+            }
+        catalogue["indexers"] = entries
+        catalogue["etag"] = etag
+        catalogue["updated"] = time.time()
+        self.save_data(f"catalogue-{self._host}", catalogue)
+
+    def _update_caps(self, catalogue: Dict[str, Any]):
+        """
+        获取缺少 caps 的索引器的检索能力，每个索引器只获取一次
+        """
+        missing = [
+            indexer_id.removesuffix("-jackett")
+            for indexer_id, entry in catalogue["indexers"].items()
+            if entry.get("caps") is None
+        ]
+        caps = self._searcher.fetch_caps(missing)
+        if not caps:
+            return
+        for indexer, entry_caps in caps.items():
+            catalogue["indexers"][f"{indexer}-jackett"]["caps"] = entry_caps
+        logger.info(f"已获取 {len(caps)} 个 Jackett 索引器的检索能力")
+        self.save_data(f"catalogue-{self._host}", catalogue)
+
+    def _sync_indexers(self, catalogue: Dict[str, Any]):
+        """
+        按配置摘要对比，仅注册新增或变化的索引器，超时时间按索引器的延迟调整
+        延迟只来自本插件的检索，MoviePilot 的检索使用注册时的超时时间，不会被熔断
+        """
+        current = {}
+        for entry in catalogue["indexers"].values():
+            conf = {**entry["conf"], "search": self._get_search_conf(entry.get("caps"))}
+            if self._health:
+                timeout = math.ceil(
+                    self._health.timeout(conf["id"].removesuffix("-jackett"))
+                )
+                conf["timeout"] = timeout
+            else:
+                timeout = None
+            digest = f'{entry["hash"]}-{bool(entry.get("caps"))}-{timeout}'
+            current[conf["domain"]] = digest
+            if self._registered.get(conf["domain"]) == digest:
+                continue
+            if conf["domain"] in self._registered:
+                logger.info(f"更新索引器：{conf['name']}")
+            else:
+                logger.info(f"注册索引器：{conf['name']}")
+            self._sites_helper.add_indexer(conf["domain"], conf)
+            self._registered[conf["domain"]] = digest
+        for domain in set(self._registered) - set(current):
+            # SitesHelper 没有提供注销接口，重启后失效
+            logger.info(f"索引器已从 Jackett 中移除：{domain}")
+            self._registered.pop(domain)
+        self._sites = [entry["conf"] for entry in catalogue["indexers"].values()]
+
+    def _get_search_conf(self, caps: Dict[str, Any] | None) -> Dict[str, Any]:
+        """
+        按索引器能力生成检索路径，电影、电视剧分别使用对应的分类和检索类型
+        """
+        paths = [
+            {
+                "path": f"?apikey={self._api_key}&t=search&q={{keyword}}",
+                "method": "get",
+                "type": "all",
+            }
+        ]
+        if not caps:
+            return {"paths": paths}
+        for mtype in MEDIA_TYPES:
+            params = build_query(caps, "{keyword}", mtype)
+            if not params:
+                continue
+            query = "&".join(f"{k}={v}" for k, v in params.items())
+            paths.append(
+                {
+                    "path": f"?apikey={self._api_key}&{query}",
+                    "method": "get",
+                    "type": mtype,
+                }
+            )
+        return {"paths": paths}
+
+    def _get_session(self) -> requests.Session:
+        """
+        获取复用的 HTTP 会话，首次使用时恢复缓存的 Cookie
+        """
+        if self._session is None:
+            session = requests.Session()
+            # 连接数不少于同时检索的索引器数量，否则多出的连接会被丢弃，无法复用
+            adapter = HTTPAdapter(
+                pool_connections=4, pool_maxsize=max(self._search_workers, 16)
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            cookies = self.get_data("cookies")
+            if cookies and cookies.get("host") == self._host:
+                session.cookies.update(cookies.get("cookies") or {})
+            self._session = session
+        return self._session
+
+    def _get_headers(self) -> Dict[str, str]:
+        return {
             "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
             "User-Agent": settings.USER_AGENT,
             "X-Api-Key": self._api_key,
             "Accept": "application/json, text/javascript, */*; q=0.01",
         }
-        cookie = None
-        session = requests.session()
-        res = RequestUtils(headers=headers, session=session).post_res(
+
+    def _close_session(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def _login(self) -> bool:
+        """
+        登录 Jackett 管理界面并缓存 Cookie
+        """
+        session = self._get_session()
+        session.cookies.clear()
+        res = RequestUtils(
+            headers=self._get_headers(), session=session, timeout=self._timeout
+        ).post_res(
             url=f"{self._host}/UI/Dashboard",
             data={"password": self._password},
             params={"password": self._password},
         )
-        if res and session.cookies:
-            cookie = session.cookies.get_dict()
+        if not res or not session.cookies:
+            logger.error("登录 Jackett 失败，请检查地址和密码")
+            return False
+        self.save_data(
+            "cookies", {"host": self._host, "cookies": session.cookies.get_dict()}
+        )
+        return True
+
+    def _get_json(self, url: str, headers: Dict[str, str] | None = None):
+        """
+        使用复用的会话请求 Jackett 接口，Cookie 失效时重新登录一次
+        """
+        for retry in range(2):
+            ret = RequestUtils(
+                headers={**self._get_headers(), **(headers or {})},
+                session=self._get_session(),
+                timeout=self._timeout,
+            ).get_res(url)
+            if ret is not None and ret.status_code == 304:
+                return ret
+            if ret is not None and ret.ok and check_response_is_valid_json(ret):
+                return ret
+            if retry or ret is None:
+                return ret
+            # 未登录时会被重定向到登录页
+            logger.info("Jackett Cookie 已失效，重新登录")
+            if not self._login():
+                return ret
+        return None
+
+    def get_indexers(self, etag: str | None = None):
+        """
+        获取配置的jackett indexer
+        :param etag: 上次请求返回的 ETag
+        :return: (indexer 配置列表, ETag)，未变化时列表为 None 并返回原 ETag，请求失败时均为 None
+        """
         indexer_query_url = f"{self._host}/api/v2.0/indexers?configured=true"
         try:
-            ret = RequestUtils(headers=headers, cookies=cookie).get_res(
-                indexer_query_url
+            ret = self._get_json(
+                indexer_query_url, headers={"If-None-Match": etag} if etag else None
             )
+            if ret is not None and ret.status_code == 304:
+                return None, etag
             if not ret:
-                return []
+                return None, None
             if not check_response_is_valid_json(ret):
                 logger.error("参数设置不正确，请检查所有的参数是否填写正确")
-                return []
-            if not ret.json():
-                return []
+                return None, None
             indexers = [
-                # IndexerConf(
-                {
-                    "id": f'{v["id"]}-jackett',
-                    "name": f'{v["name"]} (Jackett)',
-                    "domain": f'{self._host}/api/v2.0/indexers/{v["id"]}/results/torznab/',
-                    "public": True if v["type"] == "public" else False,
-                    "proxy": True,
-                    "result_num": 100,
-                    "timeout": 30,
-                    "search": {
-                        "paths": [
-                            {
-                                "path": f"?apikey={self._api_key}&t=search&q={{keyword}}",
-                                "method": "get",
-                            }
-                        ]
-                    },
-                    "torrents": {
-                        "list": {"selector": "item"},
-                        "fields": {
-                            "id": {
-                                "selector": "link",
-                            },
-                            "title": {"selector": "title"},
-                            "details": {
-                                "selector": "comments",
-                            },
-                            # "download": {
-                            #     "selector": 'td:nth-child(3) > a[href*="/download/"]',
-                            #     "attribute": "href",
-                            # },
-                            # "date_added": {"selector": "td:nth-child(5)"},
-                            "size": {"selector": "size"},
-                            "seeders": {
-                                "selector": 'torznab:attr[name="seeders"]',
-                                "attribute": "value",
+                IndexerConf.from_dict(
+                    {
+                        "id": f'{v["id"]}-jackett',
+                        "name": f'{v["name"]} (Jackett)',
+                        "domain": f'{self._host}/api/v2.0/indexers/{v["id"]}/results/torznab/',
+                        "public": True if v["type"] == "public" else False,
+                        "proxy": True,
+                        "result_num": 100,
+                        "timeout": self._search_timeout,
+                        "search": {
+                            "paths": [
+                                {
+                                    "path": f"?apikey={self._api_key}&t=search&q={{keyword}}",
+                                    "method": "get",
+                                }
+                            ]
+                        },
+                        "torrents": {
+                            "list": {"selector": "item"},
+                            "fields": {
+                                "id": {
+                                    "selector": "link",
+                                },
+                                "title": {"selector": "title"},
+                                "details": {
+                                    "selector": "comments",
+                                },
+                                # "download": {
+                                #     "selector": 'td:nth-child(3) > a[href*="/download/"]',
+                                #     "attribute": "href",
+                                # },
+                                # "date_added": {"selector": "td:nth-child(5)"},
+                                "size": {"selector": "size"},
+                                "seeders": {
+                                    "selector": 'torznab:attr[name="seeders"]',
+                                    "attribute": "value",
+                                },
+                                # "leechers": {"selector": "td:nth-child(7)"},
+                                # "grabs": {"selector": "td:nth-child(8)"},
+                                "downloadvolumefactor": {"case": {"*": 0}},
+                                "uploadvolumefactor": {"case": {"*": 1}},
                             },
-                            # "leechers": {"selector": "td:nth-child(7)"},
-                            # "grabs": {"selector": "td:nth-child(8)"},
-                            "downloadvolumefactor": {"case": {"*": 0}},
-                            "uploadvolumefactor": {"case": {"*": 1}},
                         },
-                    },
-                }
-                # )
-                for v in ret.json()
+                    }
+                ).to_dict(_INDEXER_KEYS)
+                for v in ret.json() or []
             ]
-            return indexers
+            return indexers, ret.headers.get("ETag")
         except Exception as e:
             logger.error(f"获取索引器失败：{str(e)}")
-            return []
+            return None, None
 
     def get_fake_site(self):
         pass
@@ -213,16 +472,86 @@ class Jackett(_PluginBase):
         pass
 
     def get_api(self) -> List[Dict[str, Any]] | None:
-        # return [
-        #     {
-        #         "path": "/jackett_fake_site",
-        #         "endpoint": self.get_fake_site,
-        #         "methods": ["GET"],
-        #         "summary": "Jackett 虚假站点",
-        #         "description": "Jackett 虚假站点",
-        #     }
-        # ]
-        pass
+        return [
+            {
+                "path": "/search",
+                "endpoint": self.search,
+                "methods": ["GET"],
+                "summary": "Jackett 检索",
+                "description": "并发检索所有 Jackett 索引器",
+            },
+            {
+                "path": "/metrics",
+                "endpoint": self.metrics,
+                "methods": ["GET"],
+                "summary": "Jackett 索引器状态",
+                "description": "各索引器的延迟、超时时间与熔断状态",
+            },
+        ]
+
+    def search(
+        self,
+        apikey: str,
+        keyword: str = "",
+        indexers: str = "",
+        limit: int = 0,
+        mtype: str = "",
+        imdbid: str = "",
+        tmdbid: str = "",
+        season: str = "",
+        ep: str = "",
+    ) -> schemas.Response:
+        """
+        并发检索 Jackett 索引器，只检索支持该分类的索引器
+        :param apikey: MoviePilot API 密钥
+        :param keyword: 关键字
+        :param indexers: 逗号分隔的 Jackett 索引器 ID，为空时检索全部
+        :param limit: 结果数达到该值后立即返回
+        :param mtype: 媒体类型 movie、tv
+        :param imdbid: IMDB ID
+        :param tmdbid: TMDB ID
+        :param season: 季
+        :param ep: 集
+        """
+        if apikey != settings.API_TOKEN:
+            return schemas.Response(success=False, message="API密钥错误")
+        if not self._enabled or not self._searcher:
+            return schemas.Response(success=False, message="插件未启用")
+        ids = {"imdbid": imdbid, "tmdbid": tmdbid, "season": season, "ep": ep}
+        catalogue = self._get_catalogue()["indexers"]
+        if self._aggregate:
+            query = build_query(None, keyword, mtype, **ids)
+            queries = {"all": query} if query else {}
+        else:
+            if indexers:
+                indexer_ids = [i.strip() for i in indexers.split(",") if i.strip()]
+            else:
+                indexer_ids = [i.removesuffix("-jackett") for i in catalogue]
+            queries = {}
+            for indexer in indexer_ids:
+                entry = catalogue.get(f"{indexer}-jackett") or {}
+                query = build_query(entry.get("caps"), keyword, mtype, **ids)
+                if query:
+                    queries[indexer] = query
+        if not queries:
+            return schemas.Response(
+                success=False, message="没有可检索的索引器或关键字为空"
+            )
+        results = self._searcher.search(queries=queries, limit=limit)
+        return schemas.Response(
+            success=True, data=[result.to_dict() for result in results]
+        )
+
+    def metrics(self, apikey: str) -> schemas.Response:
+        """
+        索引器延迟、超时时间与熔断状态
+        :param apikey: MoviePilot API 密钥
+        """
+        if apikey != settings.API_TOKEN:
+            return schemas.Response(success=False, message="API密钥错误")
+        if not self._health:
+            return schemas.Response(success=False, message="插件未启用")
+        return schemas.Response(success=True, data=self._health.stats())
 
     def get_service(self) -> List[Dict[str, Any]] | None:
         if self._enabled and self._cron:
@@ -331,6 +660,65 @@ class Jackett(_PluginBase):
                                         }
                                     ],
                                 },
+                                {
+                                    "component": "VCol",
+                                    "content": [
+                                        {
+                                            "component": "VTextField",
+                                            "props": {
+                                                "model": "cache_ttl",
+                                                "label": "索引器缓存时间（小时）",
+                                                "type": "number",
+                                                "placeholder": "12",
+                                            },
+                                        }
+                                    ],
+                                },
+                            ],
+                        },
+                        {
+                            "component": "VRow",
+                            "content": [
+                                {
+                                    "component": "VCol",
+                                    "content": [
+                                        {
+                                            "component": "VTextField",
+                                            "props": {
+                                                "model": "search_workers",
+                                                "label": "并发检索数",
+                                                "type": "number",
+                                                "placeholder": "8",
+                                            },
+                                        }
+                                    ],
+                                },
+                                {
+                                    "component": "VCol",
+                                    "content": [
+                                        {
+                                            "component": "VTextField",
+                                            "props": {
+                                                "model": "search_cache_ttl",
+                                                "label": "检索缓存时间（分钟）",
+                                                "type": "number",
+                                                "placeholder": "10",
+                                            },
+                                        }
+                                    ],
+                                },
+                                {
+                                    "component": "VCol",
+                                    "content": [
+                                        {
+                                            "component": "VSwitch",
+                                            "props": {
+                                                "model": "aggregate",
+                                                "label": "使用聚合接口检索",
+                                            },
+                                        }
+                                    ],
+                                },
                             ],
                         },
                         {
@@ -360,16 +748,139 @@ class Jackett(_PluginBase):
                 "password": "",
                 "cron": "0 0 */24 * *",
                 "run_once": False,
+                "cache_ttl": 12,
+                "search_workers": 8,
+                "aggregate": False,
+                "search_cache_ttl": 10,
             },
         )
 
     def get_page(self) -> List[dict] | None:
-        pass
+        if not self._searcher:
+            return None
+        stats = self._searcher.cache.stats()
+        return [
+            {
+                "component": "VRow",
+                "content": [
+                    self._stat_card("缓存条数", stats["entries"]),
+                    self._stat_card("命中", stats["hits"]),
+                    self._stat_card("未命中", stats["misses"]),
+                    self._stat_card("合并请求", stats["coalesced"]),
+                    self._stat_card("淘汰", stats["evictions"]),
+                    self._stat_card("缓存大小", f'{stats["bytes"] / 1024:.1f} KB'),
+                ],
+            },
+            {
+                "component": "VRow",
+                "content": [
+                    {
+                        "component": "VCol",
+                        "props": {"cols": 12},
+                        "content": [
+                            self._health_table(),
+                            {
+                                "component": "div",
+                                "props": {"class": "text-caption mt-2"},
+                                "text": "延迟与熔断仅统计本插件的检索接口和能力探测。"
+                                "MoviePilot 自身的站点检索不经过本插件，不计入统计、不会被熔断，"
+                                "其超时时间只在启动和定时刷新索引器时按统计结果更新，"
+                                f"没有样本时为 {self._search_timeout} 秒",
+                            },
+                        ],
+                    }
+                ],
+            },
+        ]
+
+    def _health_table(self) -> dict:
+        headers = [
+            "索引器",
+            "状态",
+            "P50 (秒)",
+            "P95 (秒)",
+            "超时 (秒)",
+            "成功",
+            "失败",
+        ]
+        rows = [
+            [
+                item["indexer"],
+                "暂停" if item["state"] == "open" else "正常",
+                item["p50"],
+                item["p95"],
+                item["timeout"],
+                item["successes"],
+                item["failures"],
+            ]
+            for item in self._health.stats()
+        ]
+        return {
+            "component": "VTable",
+            "props": {"hover": True},
+            "content": [
+                {
+                    "component": "thead",
+                    "content": [
+                        {
+                            "component": "tr",
+                            "content": [
+                                {"component": "th", "text": header}
+                                for header in headers
+                            ],
+                        }
+                    ],
+                },
+                {
+                    "component": "tbody",
+                    "content": [
+                        {
+                            "component": "tr",
+                            "content": [
+                                {"component": "td", "text": str(value)} for value in row
+                            ],
+                        }
+                        for row in rows
+                    ],
+                },
+            ],
+        }
+
+    @staticmethod
+    def _stat_card(title: str, value: Any) -> dict:
+        return {
+            "component": "VCol",
+            "props": {"cols": 6, "md": 2},
+            "content": [
+                {
+                    "component": "VCard",
+                    "props": {"variant": "tonal"},
+                    "content": [
+                        {
+                            "component": "VCardText",
+                            "content": [
+                                {
+                                    "component": "div",
+                                    "props": {"class": "text-caption"},
+                                    "text": title,
+                                },
+                                {
+                                    "component": "div",
+                                    "props": {"class": "text-h6"},
+                                    "text": str(value),
+                                },
+                            ],
+                        }
+                    ],
+                }
+            ],
+        }
 
     def stop_service(self):
         """
         退出插件
         """
+        self._close_session()
         try:
             if self._scheduler:
                 self._scheduler.remove_all_jobs()
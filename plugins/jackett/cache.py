@@ -0,0 +1,111 @@
+import time
+from collections import OrderedDict
+from threading import Event, Lock
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+class _Call:
+    """
+    进行中的请求
+    """
+
+    __slots__ = ("event", "value", "error")
+
+    def __init__(self):
+        self.event = Event()
+        self.value = None
+        self.error = None
+
+
+class SearchCache:
+    """
+    检索结果缓存：LRU + TTL，相同的并发请求只发送一次
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 600):
+        """
+        :param max_entries: 最大缓存条数
+        :param ttl: 缓存有效期（秒），为 0 时不缓存，仅合并并发请求
+        """
+        self._max_entries = max(int(max_entries), 1)
+        self._ttl = ttl
+        self._lock = Lock()
+        # key -> (过期时间, 结果, 响应字节数)
+        self._entries: OrderedDict[Hashable, Tuple[float, Any, int]] = OrderedDict()
+        self._inflight: Dict[Hashable, _Call] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.coalesced = 0
+        self.bytes = 0
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Tuple[Any, int]]) -> Any:
+        """
+        读取缓存，未命中时调用 loader 加载；同一 key 的并发请求等待同一次加载的结果
+        :param loader: 返回 (结果, 响应字节数)，抛出异常时不缓存
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                self.__remove(key)
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _Call()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error:
+                raise call.error
+            return call.value
+
+        try:
+            value, size = loader()
+            call.value = value
+            if self._ttl > 0:
+                with self._lock:
+                    self.__put(key, value, size)
+            return value
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            call.event.set()
+
+    def __put(self, key: Hashable, value: Any, size: int):
+        if key in self._entries:
+            self.__remove(key)
+        self._entries[key] = (time.monotonic() + self._ttl, value, size)
+        self.bytes += size
+        while len(self._entries) > self._max_entries:
+            self.__remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def __remove(self, key: Hashable):
+        _, _, size = self._entries.pop(key)
+        self.bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "coalesced": self.coalesced,
+                "bytes": self.bytes,
+            }
@@ -0,0 +1,145 @@
+import time
+from collections import deque
+from threading import Lock
+from typing import Any, Dict, List
+
+from app.log import logger
+
+
+class IndexerHealth:
+    """
+    单个索引器的延迟与熔断状态
+    """
+
+    __slots__ = (
+        "latencies",
+        "successes",
+        "failures",
+        "consecutive_failures",
+        "opened_at",
+    )
+
+    def __init__(self, window: int):
+        # 最近的成功请求耗时（秒）
+        self.latencies = deque(maxlen=window)
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        # 熔断开始（或最近一次探测）时间，0 表示未熔断
+        self.opened_at = 0.0
+
+    def percentile(self, percent: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(int(len(ordered) * percent), len(ordered) - 1)]
+
+
+class HealthTracker:
+    """
+    索引器健康状态：记录延迟分布，据此计算超时时间，连续失败时熔断并定期探测恢复
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        cooldown: float = 300,
+        min_timeout: float = 5,
+        max_timeout: float = 30,
+        window: int = 100,
+    ):
+        """
+        :param failure_threshold: 连续失败多少次后熔断
+        :param cooldown: 熔断后多久允许探测（秒）
+        :param min_timeout: 超时时间下限（秒）
+        :param max_timeout: 超时时间上限（秒），样本不足时使用
+        :param window: 延迟统计的样本数
+        """
+        self._failure_threshold = failure_threshold
+        self._cooldown = cooldown
+        self._min_timeout = min_timeout
+        self._max_timeout = max_timeout
+        self._window = window
+        self._lock = Lock()
+        self._indexers: Dict[str, IndexerHealth] = {}
+
+    def __get(self, indexer: str) -> IndexerHealth:
+        health = self._indexers.get(indexer)
+        if health is None:
+            health = self._indexers[indexer] = IndexerHealth(self._window)
+        return health
+
+    def allow(self, indexer: str) -> bool:
+        """
+        是否允许请求该索引器，熔断冷却结束后放行一次探测请求
+        """
+        with self._lock:
+            health = self.__get(indexer)
+            if not health.opened_at:
+                return True
+            if time.time() - health.opened_at < self._cooldown:
+                return False
+            # 放行一次探测请求，并重新开始冷却，避免并发探测
+            health.opened_at = time.time()
+            return True
+
+    def is_open(self, indexer: str) -> bool:
+        with self._lock:
+            return bool(self.__get(indexer).opened_at)
+
+    def timeout(self, indexer: str) -> float:
+        """
+        根据 p95 延迟计算超时时间
+        """
+        with self._lock:
+            health = self.__get(indexer)
+            if len(health.latencies) < 5:
+                return self._max_timeout
+            return min(
+                max(health.percentile(0.95) * 2 + 1, self._min_timeout),
+                self._max_timeout,
+            )
+
+    def record_success(self, indexer: str, latency: float):
+        with self._lock:
+            health = self.__get(indexer)
+            health.latencies.append(latency)
+            health.successes += 1
+            health.consecutive_failures = 0
+            if health.opened_at:
+                logger.info(f"Jackett 索引器 {indexer} 已恢复")
+            health.opened_at = 0.0
+
+    def record_failure(self, indexer: str):
+        with self._lock:
+            health = self.__get(indexer)
+            health.failures += 1
+            health.consecutive_failures += 1
+            if health.opened_at:
+                # 探测失败，重新计算冷却时间
+                health.opened_at = time.time()
+            elif health.consecutive_failures >= self._failure_threshold:
+                logger.warn(
+                    f"Jackett 索引器 {indexer} 连续失败 {health.consecutive_failures} 次，暂停使用"
+                )
+                health.opened_at = time.time()
+
+    def open_indexers(self) -> List[str]:
+        with self._lock:
+            return [name for name, health in self._indexers.items() if health.opened_at]
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            indexers = sorted(self._indexers.items())
+        return [
+            {
+                "indexer": name,
+                "state": "open" if health.opened_at else "closed",
+                "p50": round(health.percentile(0.5), 3),
+                "p95": round(health.percentile(0.95), 3),
+                "timeout": round(self.timeout(name), 1),
+                "successes": health.successes,
+                "failures": health.failures,
+            }
+            for name, health in indexers
+        ]
@@ -0,0 +1,236 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, as_completed
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+import requests
+from app.log import logger
+
+from .cache import SearchCache
+from .health import HealthTracker
+from .torznab import TorznabResult, iter_torznab, parse_caps
+
+# 媒体类型 -> (torznab 根分类, 检索类型, 检索功能)
+MEDIA_TYPES = {
+    "movie": ("2000", "movie", "movie-search"),
+    "tv": ("5000", "tvsearch", "tv-search"),
+}
+
+
+def build_query(
+    caps: Dict[str, Any] | None,
+    keyword: str | None = None,
+    mtype: str | None = None,
+    **ids: Any,
+) -> Dict[str, str] | None:
+    """
+    按索引器能力生成 torznab 检索参数
+    :param caps: 索引器的 caps，为空时使用通用检索
+    :param keyword: 关键字
+    :param mtype: 媒体类型 movie、tv，为空时不限分类
+    :param ids: imdbid、tmdbid、season、ep 等结构化参数
+    :return: 检索参数，索引器不支持该分类时返回 None
+    """
+    ids = {k: str(v) for k, v in ids.items() if v not in (None, "")}
+    if mtype not in MEDIA_TYPES:
+        return {"t": "search", "q": keyword} if keyword else None
+    category, function, searching = MEDIA_TYPES[mtype]
+    if caps:
+        categories = caps.get("categories") or []
+        # 分类 ID 的千位相同即属于同一根分类，如 2040 属于 2000
+        if categories and not any(
+            int(c) // 1000 == int(category) // 1000 for c in categories
+        ):
+            return None
+        supported = (caps.get("searching") or {}).get(searching)
+        if supported is not None:
+            params = {k: v for k, v in ids.items() if k in supported}
+            if keyword and "q" in supported:
+                params["q"] = keyword
+            if params.keys() - {"season", "ep"}:
+                return {"t": function, "cat": category, **params}
+    if not keyword:
+        return None
+    return {"t": "search", "cat": category, "q": keyword}
+
+
+class JackettSearcher:
+    """
+    并发检索 Jackett 索引器
+    """
+
+    def __init__(
+        self,
+        host: str,
+        api_key: str,
+        session: Callable[[], requests.Session],
+        max_workers: int = 8,
+        timeout: float = 15,
+        cache: SearchCache | None = None,
+        health: HealthTracker | None = None,
+    ):
+        """
+        :param host: Jackett 地址
+        :param api_key: Jackett API Key
+        :param session: 返回复用 HTTP 会话的函数
+        :param max_workers: 同时检索的索引器数量上限
+        :param timeout: 单个索引器的超时时间上限（秒）
+        :param cache: 检索结果缓存
+        :param health: 索引器健康状态
+        """
+        self._host = host
+        self._api_key = api_key
+        self._session = session
+        self._max_workers = max(int(max_workers), 1)
+        self._timeout = timeout
+        self.cache = cache or SearchCache()
+        self.health = health or HealthTracker(max_timeout=timeout)
+
+    def search(
+        self, queries: Dict[str, Dict[str, str]], limit: int = 0
+    ) -> List[TorznabResult]:
+        """
+        检索资源
+        :param queries: Jackett 索引器 ID -> 检索参数，索引器为 all 时使用 Jackett 的聚合接口
+        :param limit: 结果数达到该值后立即返回，0 表示等待所有索引器
+        """
+        if "all" in queries:
+            results = self.search_indexer("all", queries["all"])
+            return results[:limit] if limit else results
+        indexers = list(queries)
+        # 跳过熔断中的索引器
+        skipped = [indexer for indexer in indexers if not self.health.allow(indexer)]
+        if skipped:
+            logger.info(f"跳过暂停使用的 Jackett 索引器：{', '.join(skipped)}")
+            indexers = [indexer for indexer in indexers if indexer not in skipped]
+        if not indexers:
+            return []
+
+        results = []
+        executor = ThreadPoolExecutor(
+            max_workers=min(self._max_workers, len(indexers)),
+            thread_name_prefix="jackett-search",
+        )
+        futures = {
+            executor.submit(self.search_indexer, indexer, queries[indexer]): indexer
+            for indexer in indexers
+        }
+        # 所有索引器排队完成所需的最长时间
+        rounds = -(-len(indexers) // self._max_workers)
+        try:
+            for future in as_completed(futures, timeout=self._timeout * rounds + 1):
+                results.extend(future.result())
+                if limit and len(results) >= limit:
+                    break
+        except TimeoutError:
+            pending = [futures[f] for f in futures if not f.done()]
+            logger.warn(f"Jackett 索引器检索超时：{', '.join(pending)}")
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        return results[:limit] if limit else results
+
+    def search_indexer(
+        self, indexer: str, params: Dict[str, str]
+    ) -> List[TorznabResult]:
+        """
+        检索单个索引器，优先使用缓存，失败时返回空列表
+        """
+        key = tuple(
+            sorted(
+                (k, " ".join(v.lower().split()) if k == "q" else v)
+                for k, v in params.items()
+            )
+        )
+        try:
+            return self.cache.get_or_load(
+                (indexer, key), lambda: self._request(indexer, params, iter_torznab)
+            )
+        except Exception as e:
+            logger.warn(f"Jackett 索引器 {indexer} 检索失败：{str(e)}")
+            return []
+
+    def get_caps(self, indexer: str) -> Dict[str, Any] | None:
+        """
+        获取索引器支持的检索类型与分类，失败时返回 None
+        caps 由 Jackett 按索引器定义直接返回，不访问站点，不计入索引器的延迟与失败
+        """
+        try:
+            caps, _ = self.__request(
+                indexer,
+                {"t": "caps"},
+                lambda chunks, _: [parse_caps(b"".join(chunks))],
+                self._timeout,
+            )
+            return caps[0]
+        except Exception as e:
+            logger.debug(f"获取 Jackett 索引器 {indexer} 能力失败：{str(e)}")
+            return None
+
+    def fetch_caps(self, indexers: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        并发获取多个索引器的 caps，只返回获取成功的
+        """
+        if not indexers:
+            return {}
+        with ThreadPoolExecutor(
+            max_workers=min(self._max_workers, len(indexers)),
+            thread_name_prefix="jackett-caps",
+        ) as executor:
+            caps = dict(zip(indexers, executor.map(self.get_caps, indexers)))
+        return {indexer: c for indexer, c in caps.items() if c is not None}
+
+    def probe(self, indexer: str) -> bool:
+        """
+        探测熔断中的索引器，成功后恢复使用
+        使用不带关键字的检索，Jackett 会实际请求站点，caps 不能反映站点是否可用
+        """
+        if not self.health.allow(indexer):
+            return False
+        try:
+            self._request(indexer, {"t": "search", "limit": "1"}, iter_torznab)
+            return True
+        except Exception as e:
+            logger.debug(f"探测 Jackett 索引器 {indexer} 失败：{str(e)}")
+            return False
+
+    def _request(
+        self,
+        indexer: str,
+        params: Dict[str, str],
+        parser: Callable[[Iterator[bytes], str], Iterator[Any]],
+    ) -> Tuple[List[Any], int]:
+        """
+        请求索引器并边接收边解析，记录耗时与失败，返回 (结果, 响应字节数)
+        """
+        if indexer == "all":
+            return self.__request(indexer, params, parser, self._timeout)
+        start = time.monotonic()
+        try:
+            ret = self.__request(indexer, params, parser, self.health.timeout(indexer))
+        except Exception:
+            self.health.record_failure(indexer)
+            raise
+        self.health.record_success(indexer, time.monotonic() - start)
+        return ret
+
+    def __request(
+        self,
+        indexer: str,
+        params: Dict[str, str],
+        parser: Callable[[Iterator[bytes], str], Iterator[Any]],
+        timeout: float,
+    ) -> Tuple[List[Any], int]:
+        received = [0]
+
+        def _chunks(res: requests.Response) -> Iterator[bytes]:
+            for chunk in res.iter_content(chunk_size=65536):
+                received[0] += len(chunk)
+                yield chunk
+
+        with self._session().get(
+            f"{self._host}/api/v2.0/indexers/{indexer}/results/torznab/api",
+            params={"apikey": self._api_key, **params},
+            timeout=timeout,
+            stream=True,
+        ) as res:
+            res.raise_for_status()
+            return list(parser(_chunks(res), indexer)), received[0]
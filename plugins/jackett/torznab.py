@@ -0,0 +1,120 @@
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, Iterable, Iterator
+
+TORZNAB_ATTR = "{http://torznab.com/schemas/2015/feed}attr"
+
+
+class TorznabResult:
+    """
+    torznab 检索结果
+    """
+
+    __slots__ = (
+        "indexer",
+        "title",
+        "link",
+        "details",
+        "size",
+        "pubdate",
+        "seeders",
+        "peers",
+        "infohash",
+        "magnet",
+    )
+
+    def __init__(self, indexer: str):
+        self.indexer = indexer
+        self.title = None
+        self.link = None
+        self.details = None
+        self.size = 0
+        self.pubdate = None
+        self.seeders = 0
+        self.peers = 0
+        self.infohash = None
+        self.magnet = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def _to_int(value: str | None) -> int:
+    try:
+        return int(value or 0)
+    except ValueError:
+        return 0
+
+
+def iter_torznab(chunks: Iterable[bytes], indexer: str) -> Iterator[TorznabResult]:
+    """
+    增量解析 torznab 响应，每个 <item> 结束时一次性提取字段，随后释放该元素
+    :param chunks: 响应内容分块，如 Response.iter_content()
+    :param indexer: 索引器 ID
+    """
+    parser = ET.XMLPullParser(events=("start", "end"))
+    channel = None
+    for chunk in chunks:
+        parser.feed(chunk)
+        for event, elem in parser.read_events():
+            if event == "start":
+                if elem.tag == "channel":
+                    channel = elem
+                elif elem.tag == "error":
+                    # 站点请求失败时 Jackett 返回 <error code="..." description="..."/>
+                    raise ValueError(
+                        f'torznab 错误 {elem.get("code")}：{elem.get("description")}'
+                    )
+                continue
+            if elem.tag != "item":
+                continue
+            result = TorznabResult(indexer)
+            for child in elem:
+                tag = child.tag
+                if tag == TORZNAB_ATTR:
+                    name = child.get("name")
+                    if name == "seeders":
+                        result.seeders = _to_int(child.get("value"))
+                    elif name == "peers":
+                        result.peers = _to_int(child.get("value"))
+                    elif name == "infohash":
+                        result.infohash = child.get("value")
+                    elif name == "magneturl":
+                        result.magnet = child.get("value")
+                elif tag == "title":
+                    result.title = child.text
+                elif tag == "link":
+                    result.link = child.text
+                elif tag == "comments":
+                    result.details = child.text
+                elif tag == "size":
+                    result.size = _to_int(child.text)
+                elif tag == "pubDate":
+                    result.pubdate = child.text
+                elif tag == "enclosure" and not result.size:
+                    result.size = _to_int(child.get("length"))
+            # 释放已解析的元素，内存占用与结果总数无关
+            elem.clear()
+            if channel is not None:
+                channel.remove(elem)
+            yield result
+    parser.close()
+
+
+def parse_caps(content: bytes) -> Dict[str, Any]:
+    """
+    解析 t=caps 响应
+    :return: {"searching": {检索类型: [支持的参数]}, "categories": [分类 ID]}
+    """
+    root = ET.fromstring(content)
+    searching = {}
+    for elem in root.iterfind("searching/*"):
+        if elem.get("available") != "yes":
+            continue
+        params = elem.get("supportedParams") or "q"
+        searching[elem.tag] = [p.strip() for p in params.split(",") if p.strip()]
+    categories = {elem.get("id") for elem in root.iter("category")}
+    categories |= {elem.get("id") for elem in root.iter("subcat")}
+    return {
+        "searching": searching,
+        "categories": sorted(c for c in categories if c and c.isdigit()),
+    }
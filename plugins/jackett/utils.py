@@ -1,92 +1,91 @@
 import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable
 
 from requests import Response
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
+
+@dataclass(slots=True)
 class IndexerConf:
-    def __init__(
-        self,
-        datas=None,
-        siteid=None,
-        cookie=None,
-        name=None,
-        rule=None,
-        public=None,
-        proxy=False,
-        parser=None,
-        ua=None,
-        render=None,
-        builtin=True,
-        language=None,
-        pri=None,
-    ):
-        if not datas:
-            return None
-        # ID
-        self.id = datas.get("id")
-        # 站点ID
-        self.siteid = siteid
-        # 名称
-        self.name = datas.get("name") if not name else name
-        # 是否内置站点
-        self.builtin = datas.get("builtin")
-        # 域名
-        self.domain = datas.get("domain")
-        # 搜索
-        self.search = datas.get("search", {})
-        # 批量搜索，如果为空对象则表示不支持批量搜索
-        self.batch = self.search.get("batch", {}) if builtin else {}
-        # 解析器
-        self.parser = parser if parser is not None else datas.get("parser")
-        # 是否启用渲染
-        self.render = render if render is not None else datas.get("render")
-        # 浏览
-        self.browse = datas.get("browse", {})
-        # 种子过滤
-        self.torrents = datas.get("torrents", {})
-        # 分类
-        self.category = datas.get("category", {})
-        # Cookie
-        self.cookie = cookie
-        # User-Agent
-        self.ua = ua
-        # 过滤规则
-        self.rule = rule
-        # 是否公开站点
-        self.public = datas.get("public") if not public else public
-        # 是否使用代理
-        self.proxy = datas.get("proxy") if not proxy else proxy
-        # 仅支持的特定语种
-        self.language = language
-        # 索引器优先级
-        self.pri = pri if pri else 0
+    # ID
+    id: str = ""
+    # 站点ID
+    siteid: str = ""
+    # 名称
+    name: str = ""
+    # 是否内置站点
+    builtin: bool = True
+    # 域名
+    domain: str = ""
+    # 搜索
+    search: Dict[str, Any] = field(default_factory=dict)
+    # 批量搜索，如果为空对象则表示不支持批量搜索
+    batch: Dict[str, Any] = field(default_factory=dict)
+    # 解析器
+    parser: str = ""
+    # 是否启用渲染
+    render: bool = False
+    # 浏览
+    browse: Dict[str, Any] = field(default_factory=dict)
+    # 种子过滤
+    torrents: Dict[str, Any] = field(default_factory=dict)
+    # 分类
+    category: Dict[str, Any] = field(default_factory=dict)
+    # Cookie
+    cookie: str = ""
+    # User-Agent
+    ua: str = ""
+    # 过滤规则
+    rule: str = ""
+    # 是否公开站点
+    public: bool = False
+    # 是否使用代理
+    proxy: bool = False
+    # 仅支持的特定语种
+    language: str = ""
+    # 索引器优先级
+    pri: int = 0
+    # 检索结果数量上限
+    result_num: int = 100
+    # 请求超时时间（秒）
+    timeout: int = 30
+
+    @classmethod
+    def from_dict(cls, datas: Dict[str, Any], **kwargs) -> "IndexerConf":
+        """
+        从配置字典创建，kwargs 中非空的值覆盖配置中的值，未知的键忽略
+        """
+        values = {k: v for k, v in datas.items() if v is not None and k in _FIELDS}
+        if kwargs:
+            values.update(
+                (k, v) for k, v in kwargs.items() if v is not None and k in _FIELDS
+            )
+        if not values.get("batch") and values.get("builtin", True):
+            values["batch"] = values.get("search", {}).get("batch") or {}
+        return cls(**values)
 
-    def to_dict(self):
-        return {
-            "id": self.id or "",
-            "siteid": self.siteid or "",
-            "name": self.name or "",
-            "builtin": self.builtin or True,
-            "domain": self.domain or "",
-            "search": self.search or "",
-            "batch": self.batch or {},
-            "parser": self.parser or "",
-            "render": self.render or False,
-            "browse": self.browse or {},
-            "torrents": self.torrents or {},
-            "category": self.category or {},
-            "cookie": self.cookie or "",
-            "ua": self.ua or "",
-            "rule": self.rule or "",
-            "public": self.public or False,
-            "proxy": self.proxy or "",
-            "pri": self.pri or 0,
-        }
+    def to_dict(self, keys: Iterable[str] | None = None) -> Dict[str, Any]:
+        """
+        :param keys: 只输出指定的字段，为空时输出全部字段
+        """
+        return {name: getattr(self, name) for name in keys or self.__slots__}
 
-    def to_dict_str(self, ensure_ascii=False, formatted=True):
+    def to_dict_str(self, ensure_ascii=False, formatted=False) -> str:
         if formatted:
             return json.dumps(self.to_dict(), ensure_ascii=ensure_ascii, indent=4)
-        return json.dumps(self.to_dict(), ensure_ascii=ensure_ascii)
+        if orjson and not ensure_ascii:
+            return orjson.dumps(self.to_dict()).decode()
+        return json.dumps(
+            self.to_dict(), ensure_ascii=ensure_ascii, separators=(",", ":")
+        )
+
+
+_FIELDS = frozenset(IndexerConf.__slots__)
 
 
 def check_response_is_valid_json(response: Response):